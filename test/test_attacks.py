@@ -0,0 +1,30 @@
+from tetra import attacks, piece, position, square
+
+
+def test_rays():
+    rays = dict(attacks.RAYS[square.A1])
+    assert rays[piece.N] == tuple(square.SQUARES[48::-8])
+    assert rays[piece.N + piece.E][-1] == square.H8
+    assert rays[piece.S] == ()
+    assert sum(len(ray) for ray in attacks.ORTHOGONAL_RAYS[square.E4]) == 14
+
+
+def test_leapers():
+    assert sorted(attacks.KNIGHT_SQUARES[square.A1]) == [square.B3, square.C2]
+    assert len(attacks.KING_SQUARES[square.E4]) == 8
+    assert sorted(attacks.PAWN_ATTACKER_SQUARES[piece.WHITE][square.E4]) == [
+        square.D3,
+        square.F3,
+    ]
+    assert attacks.PAWN_ATTACKER_SQUARES[piece.BLACK][square.A8] == ()
+
+
+def test_is_attacked():
+    my_fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_position = position.Position(my_fen)
+    for color in (piece.WHITE, piece.BLACK):
+        for square_i in square.SQUARES:
+            my_square = square.Square(square_i)
+            assert my_position.is_attacked(color, my_square) == bool(
+                my_position.find_attackers(color, my_square)
+            )
@@ -0,0 +1,121 @@
+import io
+import json
+
+import pytest
+
+from tetra import batch, position, search
+
+EPD_LINES = [
+    "# reference positions\n",
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - bm e4; id "start";\n',
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1\n",
+    "\n",
+    "7k/6Q1/6K1/8/8/8/8/8 b - - 0 1\n",
+    "7k/5Q2/6K1/8/8/8/8/8 b - - hmvc 12; fmvn 40;\n",
+]
+
+
+def test_parse_line():
+    assert batch.parse_line("  \n") is None
+    assert batch.parse_line("# comment") is None
+    assert batch.parse_line(EPD_LINES[1]) == {
+        "id": "start",
+        "fen": position.INITIAL_FEN,
+    }
+    assert batch.parse_line(EPD_LINES[5]) == {"fen": "7k/5Q2/6K1/8/8/8/8/8 b - - 12 40"}
+
+
+def test_chunked():
+    chunks = list(batch.chunked(iter(range(7)), 3))
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_run_batch():
+    records = batch.read_records(EPD_LINES)
+    results = list(batch.run_batch(records, "status", workers=1))
+    assert [result["status"] for result in results] == [
+        "ok",
+        "ok",
+        "checkmate",
+        "stalemate",
+    ]
+
+    with pytest.raises(ValueError):
+        list(batch.run_batch(records, "evaluate"))
+
+
+@pytest.mark.parametrize("operation", ["moves", "perft"])
+def test_run_batch_workers(operation):
+    # Results come back in input order whatever the chunk size
+    records = list(batch.read_records(EPD_LINES)) * 3
+    results = list(
+        batch.run_batch(records, operation, depth=2, workers=2, chunk_size=2)
+    )
+    assert [result["fen"] for result in results] == [
+        record["fen"] for record in records
+    ]
+    if operation == "moves":
+        assert [result["moves"] for result in results[:4]] == [20, 48, 0, 0]
+    else:
+        assert [result["nodes"] for result in results[:4]] == [400, 2039, 0, 0]
+
+
+def test_run_batch_search(monkeypatch):
+    # One table is allocated for the whole batch, not one per record
+    tables = []
+
+    class Table(search.TranspositionTable):
+        def __init__(self, size_mb: float = 16) -> None:
+            super().__init__(size_mb)
+            tables.append(self)
+
+    monkeypatch.setattr(search, "TranspositionTable", Table)
+    records = [{"fen": "4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1"}] * 3
+    results = list(batch.run_batch(records, "search", depth=2, workers=1, hash_mb=1))
+    assert len(tables) == 1
+    assert tables[0].size * search.TT_ENTRY_SIZE <= 2**20
+    for result in results:
+        assert result["best_move"] == "d1d5"
+        assert result["pv"].startswith("d1d5")
+
+
+def test_run_batch_search_workers():
+    records = [{"fen": "4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1"}] * 4
+    results = list(
+        batch.run_batch(records, "search", depth=2, workers=2, chunk_size=1, hash_mb=1)
+    )
+    assert [result["best_move"] for result in results] == ["d1d5"] * 4
+
+
+def test_run_batch_error():
+    [result] = batch.run_batch([{"fen": "garbage"}], "moves", workers=1)
+    assert "error" in result
+    assert "moves" not in result
+
+
+def test_write_results():
+    results = list(batch.run_batch(batch.read_records(EPD_LINES), "moves", workers=1))
+
+    output = io.StringIO()
+    assert batch.write_jsonl(results, output) == 4
+    lines = output.getvalue().splitlines()
+    assert json.loads(lines[0]) == {
+        "id": "start",
+        "fen": position.INITIAL_FEN,
+        "moves": 20,
+    }
+
+    output = io.StringIO()
+    assert batch.write_csv(results, output, "moves") == 4
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "id,fen,moves,error"
+    assert lines[1] == f"start,{position.INITIAL_FEN},20,"
+
+
+def test_main(tmp_path, capsys):
+    input_path = tmp_path / "positions.epd"
+    input_path.write_text("".join(EPD_LINES))
+    output_path = tmp_path / "results.csv"
+    assert batch.main([str(input_path), "-o", str(output_path), "-j", "1"]) == 0
+    assert output_path.read_text().splitlines()[0] == "id,fen,moves,error"
+    assert "4 positions" in capsys.readouterr().err
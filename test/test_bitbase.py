@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from tetra import bitbase, piece, position, search, square
+
+
+@pytest.fixture(scope="module")
+def bitbases(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("bitbases")
+    bitbase.generate_files(["KPK", "KRK", "KQK"], directory)
+    with bitbase.Bitbases(directory) as tables:
+        yield tables
+
+
+def random_position(symbol, my_random):
+    # A legal position with the given piece and random side to move
+    while True:
+        board = list(position.EMPTY_BOARD)
+        squares = my_random.sample(range(64), 3)
+        for symbol_j, number in zip(["K", "k", symbol], squares):
+            board[square.SQUARE_INDEXES[number]] = symbol_j
+        if symbol in "Pp" and not 8 <= squares[2] < 56:
+            continue
+        turn = my_random.choice([piece.WHITE, piece.BLACK])
+        my_position = position.Position()
+        my_position.set_position(board, turn, [], None, 0, 1)
+        if not my_position.is_attacked(turn, my_position.find_king(3 - turn)):
+            return my_position
+
+
+@pytest.mark.parametrize(
+    "fen, result",
+    [
+        ("4k3/8/4K3/4P3/8/8/8/8 b - - 0 1", bitbase.LOSS),
+        ("4k3/8/4K3/4P3/8/8/8/8 w - - 0 1", bitbase.WIN),
+        ("8/8/8/8/8/4k3/4p3/4K3 w - - 0 1", bitbase.DRAW),
+        ("k7/8/8/8/8/8/P7/K7 b - - 0 1", bitbase.DRAW),
+        ("8/8/8/8/8/4k3/3p4/5K2 b - - 0 1", bitbase.WIN),
+        ("8/8/8/8/8/8/1Q6/k5K1 b - - 0 1", bitbase.DRAW),
+        ("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1", bitbase.DRAW),
+        ("8/8/8/8/8/8/1q6/K1k5 w - - 0 1", bitbase.LOSS),
+        ("8/8/8/4k3/8/8/8/R3K3 w - - 0 1", bitbase.WIN),
+    ],
+)
+def test_probe(bitbases, fen, result):
+    assert bitbases.probe(position.Position(fen)) == result
+
+
+def test_probe_outside(bitbases):
+    assert len(bitbases) == 3
+    assert bitbases.probe(position.Position()) is None
+    assert bitbases.probe(position.Position("8/8/8/4k3/8/8/8/N3K3 w - - 0 1")) is None
+
+
+@pytest.mark.parametrize("symbol", ["P", "r", "Q"])
+def test_probe_matches_moves(bitbases, symbol):
+    # Each result follows from the results after each legal move
+    my_random = random.Random(symbol)
+    for _ in range(200):
+        my_position = random_position(symbol, my_random)
+        my_moves = my_position.generate_moves()
+        if not my_moves:
+            expected = bitbase.LOSS if my_position.is_check() else bitbase.DRAW
+        else:
+            expected = bitbase.LOSS
+            for my_move in my_moves:
+                my_position.make_move(my_move)
+                child = bitbases.probe(my_position)
+                my_position.unmake_move()
+                expected = max(expected, -child if child is not None else 0)
+        assert bitbases.probe(my_position) == expected, my_position.fen()
+
+
+def test_bitbase_file(tmp_path):
+    path = tmp_path / "KNK.bitbase"
+    assert bitbase.main(["KNK", "-o", str(tmp_path)]) == 0
+    assert path.stat().st_size == bitbase.BITBASE_SIZE
+    with bitbase.Bitbases(tmp_path) as bitbases:
+        my_position = position.Position("8/8/8/4k3/8/8/8/N3K3 w - - 0 1")
+        assert bitbases.probe(my_position) == bitbase.DRAW
+
+    path.write_bytes(b"\0" * 16)
+    with pytest.raises(ValueError):
+        bitbase.Bitbase(path)
+    with pytest.raises(ValueError):
+        bitbase.generate("KRRK")
+
+
+def test_search(bitbases):
+    searcher = search.Searcher(bitbases=bitbases)
+    my_position = position.Position("8/8/8/4k3/8/8/8/R3K3 w - - 0 1")
+    result = searcher.search(my_position, search.SearchLimits(depth=2))
+    assert search.KNOWN_WIN_SCORE < result.score < search.MATE_THRESHOLD
+
+    my_position = position.Position("k7/8/8/8/8/8/P7/K7 b - - 0 1")
+    result = searcher.search(my_position, search.SearchLimits(depth=3))
+    assert result.score == 0
+
+
+def test_search_mates(bitbases):
+    # Known wins below the root are still searched, so mates are found
+    searcher = search.Searcher(bitbases=bitbases)
+    my_position = position.Position("k7/8/1K6/8/8/8/8/7Q w - - 0 1")
+    result = searcher.search(my_position, search.SearchLimits(depth=4))
+    assert result.best_move.uci() == "h1h8"
+    assert result.mate_in() == 1
+
+    # The winning side makes progress instead of repeating
+    my_position = position.Position("8/8/3k4/8/8/8/8/4K2Q w - - 0 1")
+    for _ in range(40):
+        if not my_position.generate_moves():
+            break
+        result = searcher.search(my_position, search.SearchLimits(depth=3))
+        my_position.make_move(result.best_move)
+    assert my_position.is_check() and not my_position.generate_moves()
@@ -0,0 +1,81 @@
+from tetra import bitboard, perft, piece, position, square
+
+
+def test_square_mapping():
+    assert bitboard.MAILBOX_TO_BB[square.A1] == 0
+    assert bitboard.MAILBOX_TO_BB[square.H8] == 63
+    assert bitboard.BB_TO_MAILBOX[bitboard.MAILBOX_TO_BB[square.E4]] == square.E4
+
+
+def test_sliding_attacks():
+    e4 = bitboard.MAILBOX_TO_BB[square.E4]
+    e6 = bitboard.MAILBOX_TO_BB[square.E6]
+    attacks = bitboard.rook_attacks(e4, bitboard.BB_SQUARES[e6])
+    assert attacks & bitboard.BB_SQUARES[e6]
+    assert not attacks & bitboard.BB_SQUARES[bitboard.MAILBOX_TO_BB[square.E7]]
+    assert bin(attacks).count("1") == 12
+
+
+def test_initial_position():
+    my_position = bitboard.BitboardPosition()
+    assert my_position.board == position.Position().board
+    assert my_position.fen() == position.INITIAL_FEN
+    assert len(my_position.generate_moves()) == 20
+
+
+def test_perft_positions():
+    for name, (fen, expected) in perft.PERFT_POSITIONS.items():
+        my_position = bitboard.BitboardPosition(fen)
+        assert perft.perft(my_position, 3) == expected[2], name
+        assert my_position.fen() == fen
+
+
+def test_attackers_giuoco_piano():
+    giuoco_piano = "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"
+    my_position = bitboard.BitboardPosition(giuoco_piano)
+
+    assert my_position.find_attackers(piece.WHITE, square.Square.from_name("d5")) == [
+        square.Square.from_name("e4"),
+        square.Square.from_name("c4"),
+    ]
+    assert my_position.is_attacked(piece.BLACK, square.Square.from_name("d4"))
+    assert not my_position.is_attacked(piece.BLACK, square.Square.from_name("e4"))
+
+
+def test_set_piece():
+    my_position = bitboard.BitboardPosition()
+    my_position.set_piece(piece.Piece.from_symbol("q"), square.Square.from_name("e2"))
+    my_position.remove_piece(square.Square.from_name("f2"))
+    assert my_position.is_check()
+    my_moves = my_position.generate_moves()
+    assert sorted(my_move.uci() for my_move in my_moves) == [
+        "d1e2",
+        "e1e2",
+        "f1e2",
+        "g1e2",
+    ]
+
+
+def test_cross_check():
+    for name in ["kiwipete", "position3", "position4"]:
+        fen, _ = perft.PERFT_POSITIONS[name]
+        assert perft.cross_check(fen, 2) is None
+
+
+def test_iter_moves():
+    fen, _ = perft.PERFT_POSITIONS["kiwipete"]
+    my_position = bitboard.BitboardPosition(fen)
+    my_moves = list(my_position.iter_moves())
+    assert set(my_moves) == set(position.Position(fen).generate_moves())
+    assert len(my_position.generate_captures()) == 8
+    assert list(my_position.iter_moves(position.CAPTURE_STAGE)) == my_moves[:8]
+
+
+def test_copy():
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_position = bitboard.BitboardPosition(fen)
+    my_copy = my_position.copy(stack=True)
+    for _ in range(4):
+        my_copy.make_move(my_copy.generate_moves()[0])
+    assert my_position.fen() == fen
+    assert perft.perft(my_position, 2) == 2039
@@ -0,0 +1,62 @@
+import pytest
+
+from tetra import cache, move, perft, position
+
+
+def test_perft_table_size():
+    table = cache.PerftTable(1)
+    assert table.size == 1 << 15
+    assert table.size * cache.PERFT_ENTRY_SIZE <= 2**20
+    assert len(table) == 0
+
+
+def test_perft_table_probe():
+    table = cache.PerftTable(0.01)
+    table.store(12345, 3, 97862)
+    assert table.probe(12345, 3) == 97862
+    assert table.probe(12345, 2) is None
+    assert table.probe(12345 + table.size, 3) is None
+    assert (table.stats.hits, table.stats.misses, table.stats.stores) == (1, 2, 1)
+
+
+def test_perft_table_replacement():
+    table = cache.PerftTable(0.01, replacement="depth")
+    table.store(1, 4, 100)
+    table.store(1 + table.size, 2, 10)
+    assert table.probe(1, 4) == 100
+    assert table.stats.evictions == 0
+
+    table = cache.PerftTable(0.01, replacement="always")
+    table.store(1, 4, 100)
+    table.store(1 + table.size, 2, 10)
+    assert table.probe(1 + table.size, 2) == 10
+    assert table.stats.evictions == 1
+
+    with pytest.raises(ValueError):
+        cache.PerftTable(1, replacement="never")
+
+
+def test_perft_with_table():
+    table = cache.PerftTable(1)
+    fen, expected = perft.PERFT_POSITIONS["position4"]
+    assert perft.perft(position.Position(fen), 3, table) == expected[2]
+    assert table.stats.stores > 0
+
+    # A second run is served from the table
+    assert perft.perft(position.Position(fen), 3, table) == expected[2]
+    assert table.stats.hits == 1
+
+
+def test_move_cache():
+    move_cache = cache.MoveCache(maxsize=2)
+    my_position = position.Position()
+    assert len(move_cache.generate_moves(my_position)) == 20
+    assert len(move_cache.generate_moves(my_position)) == 20
+    assert move_cache.stats.hits == 1
+
+    for uci in ["e2e4", "e7e5"]:
+        my_position.make_move(move.Move.from_uci(uci))
+        move_cache.generate_moves(my_position)
+    assert len(move_cache) == 2
+    assert move_cache.stats.evictions == 1
+    assert move_cache.stats.as_dict()["misses"] == 3
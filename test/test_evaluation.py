@@ -0,0 +1,72 @@
+from tetra import bitboard, evaluation, move, piece, position, square
+
+
+def test_square_scores():
+    # Black scores mirror white scores
+    for white_square, black_square in [(square.E4, square.E5), (square.G1, square.G8)]:
+        for symbol in "PNBRQK":
+            assert (
+                evaluation.MIDDLEGAME_SCORES[symbol][white_square]
+                == -evaluation.MIDDLEGAME_SCORES[symbol.lower()][black_square]
+            )
+            assert (
+                evaluation.ENDGAME_SCORES[symbol][white_square]
+                == -evaluation.ENDGAME_SCORES[symbol.lower()][black_square]
+            )
+
+
+def test_taper():
+    assert evaluation.taper(100, 20, evaluation.MAX_PHASE) == 100
+    assert evaluation.taper(100, 20, 0) == 20
+    assert evaluation.taper(100, 20, 12) == 60
+    assert evaluation.taper(100, 20, 30) == 100
+
+
+def test_eval():
+    my_position = position.Position()
+    assert my_position.eval() == 0
+    assert my_position.phase == evaluation.MAX_PHASE
+
+    my_position = position.Position("4k3/8/8/8/8/8/8/3QK3 w - - 0 1")
+    assert my_position.eval() > 800
+    my_position = position.Position("4k3/8/8/8/8/8/8/3QK3 b - - 0 1")
+    assert my_position.eval() < -800
+
+
+def test_eval_incremental():
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    for backend in [position.Position, bitboard.BitboardPosition]:
+        my_position = backend(fen)
+        scores = evaluation.compute_scores(my_position.board)
+        for my_move in my_position.generate_moves():
+            my_position.make_move(my_move)
+            assert (
+                my_position.middlegame_score,
+                my_position.endgame_score,
+                my_position.phase,
+            ) == evaluation.compute_scores(my_position.board)
+            my_position.unmake_move()
+            assert (
+                my_position.middlegame_score,
+                my_position.endgame_score,
+                my_position.phase,
+            ) == scores
+
+
+def test_eval_promotion():
+    my_position = position.Position("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+    my_position.make_move(move.Move.from_uci("a7b8q"))
+    assert my_position.phase == evaluation.PHASE_WEIGHTS[piece.QUEEN]
+    assert (
+        my_position.middlegame_score,
+        my_position.endgame_score,
+        my_position.phase,
+    ) == evaluation.compute_scores(my_position.board)
+
+
+def test_eval_set_piece():
+    my_position = position.Position("4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+    my_position.set_piece(piece.Piece.from_symbol("R"), square.Square.from_name("a1"))
+    assert my_position.phase == 2
+    my_position.remove_piece(square.Square.from_name("a1"))
+    assert (my_position.middlegame_score, my_position.phase) == (0, 0)
@@ -1,3 +1,6 @@
+import array
+import pickle
+
 from tetra import move, piece, square
 
 
@@ -19,3 +22,25 @@ def test_promotion():
 
     my_move = move.Move.from_uci("a7a8n")
     assert my_move.promotion == piece.Piece.from_symbol("N")
+
+
+def test_move_int():
+    for uci in ["e2e4", "a1h8", "h8a1", "a7a8q", "b2a1n", "g7h8r"]:
+        my_move = move.Move.from_uci(uci)
+        assert 0 <= my_move.to_int() < 1 << 16
+        assert move.Move.from_int(my_move.to_int()) == my_move
+
+    my_moves = [move.Move.from_uci("e2e4"), move.Move.from_uci("a7a8q")]
+    my_array = array.array("H", [x.to_int() for x in my_moves])
+    assert [move.Move.from_int(x) for x in my_array] == my_moves
+
+
+def test_move_hash():
+    assert len({move.Move.from_uci("e2e4"), move.Move.from_uci("e2e4")}) == 1
+    assert move.Move.from_uci("a7a8q") != move.Move.from_uci("a7a8n")
+    assert hash(move.Move.from_uci("a7a8q")) != hash(move.Move.from_uci("a7a8n"))
+
+
+def test_move_pickle():
+    my_move = move.Move.from_uci("a7a8q")
+    assert pickle.loads(pickle.dumps(my_move)) == my_move
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tetra import position, square, store
+from tetra import numpy as tetra_numpy
+
+FENS = [
+    position.INITIAL_FEN,
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w Kq f6 0 3",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 0 1",
+]
+
+
+def test_positions_to_planes():
+    planes = tetra_numpy.positions_to_planes(position.Position.from_fen_many(FENS))
+    assert planes.shape == (3, tetra_numpy.PLANES, 8, 8)
+    assert planes.dtype == np.uint8
+
+    # White pawns on rank 2, black king on e8, white to move with all rights
+    assert planes[0, 0, 1].tolist() == [1] * 8
+    assert planes[0, 11, 7, 4] == 1
+    assert planes[0, :12].sum() == 32
+    assert planes[0, tetra_numpy.TURN_PLANE].all()
+    assert all(planes[0, plane].all() for plane in tetra_numpy.CASTLING_PLANES)
+    assert not planes[0, tetra_numpy.EP_PLANE].any()
+
+    # Kingside right only for white, queenside only for black, en passant on f6
+    castling = [planes[1, plane].all() for plane in tetra_numpy.CASTLING_PLANES]
+    assert castling == [True, False, False, True]
+    f6 = square.Square.from_name("f6").number()
+    assert planes[1, tetra_numpy.EP_PLANE].sum() == 1
+    assert planes[1, tetra_numpy.EP_PLANE, f6 >> 3, f6 & 7] == 1
+
+    assert not planes[2, tetra_numpy.TURN_PLANE].any()
+    assert planes[2, :12].sum() == 10
+
+
+def test_planes_reuse_buffer():
+    out = tetra_numpy.allocate(8, np.float32)
+    out[:] = 7
+    planes = tetra_numpy.positions_to_planes(
+        position.Position.from_fen_many(FENS), out=out
+    )
+    assert planes.shape == (3, tetra_numpy.PLANES, 8, 8)
+    assert np.shares_memory(planes, out)
+    assert set(np.unique(planes).tolist()) == {0.0, 1.0}
+
+    with pytest.raises(ValueError):
+        tetra_numpy.positions_to_planes(
+            position.Position.from_fen_many(FENS), out=tetra_numpy.allocate(2)
+        )
+
+
+def test_store_to_planes(tmp_path):
+    with store.PositionStore(tmp_path / "positions.bin") as my_store:
+        my_store.extend(position.Position.from_fen_many(FENS))
+        planes = tetra_numpy.store_to_planes(my_store, 1)
+        expected = tetra_numpy.positions_to_planes(
+            position.Position.from_fen_many(FENS[1:])
+        )
+        assert (planes == expected).all()
@@ -0,0 +1,51 @@
+import pytest
+
+from tetra import bitboard, parallel, perft, position, search
+
+KIWIPETE_FEN, KIWIPETE_COUNTS = perft.PERFT_POSITIONS["kiwipete"]
+
+
+def test_root_children():
+    children = parallel.root_children(position.Position())
+    assert len(children) == 20
+    uci, fen, count = children[0]
+    my_position = position.Position()
+    assert uci in [my_move.uci() for my_move in my_position.generate_moves()]
+    assert fen.split()[1] == "b"
+    assert count == 20
+
+
+@pytest.mark.parametrize("schedule", parallel.SCHEDULES)
+def test_parallel_divide(schedule):
+    nodes = perft.parallel_divide(KIWIPETE_FEN, 3, workers=2, schedule=schedule)
+    assert nodes == perft.divide(position.Position(KIWIPETE_FEN), 3)
+
+
+def test_parallel_perft():
+    for depth in [1, 2, 3]:
+        assert (
+            perft.parallel_perft(
+                KIWIPETE_FEN, depth, bitboard.BitboardPosition, workers=2, hash_mb=1
+            )
+            == KIWIPETE_COUNTS[depth - 1]
+        )
+
+    with pytest.raises(ValueError):
+        perft.parallel_perft(KIWIPETE_FEN, 3, workers=2, schedule="random")
+
+
+def test_analyse_root():
+    fen = "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+    scores = parallel.analyse_root(fen, 2, workers=2, hash_mb=1)
+    assert len(scores) == len(position.Position(fen).generate_moves())
+    assert next(iter(scores)) == "h5f7"
+    assert scores["h5f7"] == search.MATE_SCORE - 1
+
+
+def test_analyse_positions():
+    fens = [position.INITIAL_FEN, "4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1"]
+    results = parallel.analyse_positions(
+        fens, search.SearchLimits(depth=2), workers=2, hash_mb=1
+    )
+    assert [result.depth for result in results] == [2, 2]
+    assert results[1].best_move.uci() == "d1d5"
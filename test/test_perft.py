@@ -0,0 +1,46 @@
+from tetra import perft, position
+
+
+def test_perft_positions():
+    for name, (fen, expected) in perft.PERFT_POSITIONS.items():
+        my_position = position.Position(fen)
+        assert perft.perft(my_position, 1) == expected[0], name
+        assert perft.perft(my_position, 2) == expected[1], name
+        assert my_position.fen() == fen
+
+
+def test_perft_position3():
+    fen, expected = perft.PERFT_POSITIONS["position3"]
+    assert perft.perft(position.Position(fen), 3) == expected[2]
+
+
+def test_divide():
+    my_divide = perft.divide(position.Position(), 2)
+    assert len(my_divide) == 20
+    assert my_divide["e2e4"] == 20
+    assert sum(my_divide.values()) == 400
+
+
+def test_run_perft():
+    fen, expected = perft.PERFT_POSITIONS["initial"]
+    results = list(perft.run_perft("initial", fen, 2, expected))
+    assert [result.nodes for result in results] == [20, 400]
+    assert all(result.is_ok() for result in results)
+
+
+def test_main(capsys):
+    assert perft.main(["--position", "initial", "--depth", "2"]) == 0
+    assert "initial depth 2: 400 nodes" in capsys.readouterr().out
+
+
+def test_main_backend(capsys):
+    assert perft.main(["-p", "kiwipete", "-d", "3", "--backend", "bitboard"]) == 0
+    assert "kiwipete depth 3: 97862 nodes" in capsys.readouterr().out
+
+    assert perft.main(["-p", "position4", "-d", "2", "-b", "bitboard", "--check"]) == 0
+    assert "bitboard matches mailbox" in capsys.readouterr().out
+
+
+def test_main_hash(capsys):
+    assert perft.main(["-p", "initial", "-d", "3", "--hash", "1"]) == 0
+    assert "hash: CacheStats(" in capsys.readouterr().out
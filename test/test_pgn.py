@@ -0,0 +1,99 @@
+import io
+
+import pytest
+
+from tetra import bitboard, move, pgn, position
+
+PGN_TEXT = """[Event "Casual game"]
+[White "Anderssen"]
+[Black "Kieseritzky"]
+[Result "1-0"]
+
+1. e4 e5 2. f4 exf4 3. Bc4 Qh4+ {The queen checks
+from afar} 4. Kf1 b5 $2 5. Bxb5 Nf6 (5... Qf6 6. Nc3) 6. Nf3 Qh6 7. d3 Nh5
+8. Nh4 Qg5 9. Nf5 c6 10. g4 Nf6 11. Rg1 cxb5 12. h4 Qg6 13. h5 Qg5 14. Qf3
+Ng8 15. Bxf4 Qf6 16. Nc3 Bc5 17. Nd5 Qxb2 18. Bd6 Bxg1 ; gives up the rook
+19. e5 Qxa1+ 20. Ke2 Na6 21. Nxg7+ Kd8 22. Qf6+ Nxf6 23. Be7# 1-0
+
+[Event "Fragment"]
+[SetUp "1"]
+[FEN "4k3/P7/8/8/8/8/8/4K2R w K - 0 1"]
+
+1.a8=Q+ Kd7 2.O-O *
+"""
+
+
+def test_read_games():
+    games = list(pgn.read_games(io.StringIO(PGN_TEXT)))
+    assert len(games) == 2
+
+    immortal, fragment = games
+    assert immortal.headers["White"] == "Anderssen"
+    assert immortal.result == "1-0"
+    assert len(immortal.moves) == 45
+    assert immortal.moves[:4] == ["e4", "e5", "f4", "exf4"]
+    assert immortal.moves[-1] == "Be7#"
+
+    assert fragment.moves == ["a8=Q+", "Kd7", "O-O"]
+    assert fragment.result == "*"
+
+
+@pytest.mark.parametrize("backend", [position.Position, bitboard.BitboardPosition])
+def test_replay(backend):
+    immortal, fragment = pgn.read_games(io.StringIO(PGN_TEXT))
+    my_position = immortal.replay(backend)
+    assert len(my_position.move_stack) == 45
+    assert my_position.fen() == (
+        "r1bk3r/p2pBpNp/n4n2/1p1NP2P/6P1/3P4/P1P1K3/q5b1 b - - 1 23"
+    )
+    assert not my_position.generate_moves()
+
+    my_position = fragment.replay(backend)
+    assert my_position.fen() == "Q7/3k4/8/8/8/8/8/5RK1 b - - 2 2"
+
+    broken = pgn.Game(moves=["e4", "e4"])
+    with pytest.raises(ValueError, match="ply 2"):
+        broken.replay(backend)
+
+
+def test_parse_san():
+    my_position = position.Position(
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    )
+    assert pgn.parse_san(my_position, "Nxd7") == move.Move.from_uci("e5d7")
+    assert pgn.parse_san(my_position, "Qxf6") == move.Move.from_uci("f3f6")
+    assert pgn.parse_san(my_position, "gxh3") == move.Move.from_uci("g2h3")
+    assert pgn.parse_san(my_position, "a4") == move.Move.from_uci("a2a4")
+    assert pgn.parse_san(my_position, "O-O-O") == move.Move.from_uci("e1c1")
+    assert pgn.parse_san(my_position, "Rb1") == move.Move.from_uci("a1b1")
+
+    for san in ["Ke3", "Qxh8", "e5", "Nd2", "O-O-O-O", "axb3"]:
+        with pytest.raises(ValueError):
+            pgn.parse_san(my_position, san)
+
+    # Two knights reach b5, so the file is needed
+    my_position = position.Position("4k3/8/8/8/8/N1N5/8/4K3 w - - 0 1")
+    with pytest.raises(ValueError, match="ambiguous"):
+        pgn.parse_san(my_position, "Nb5")
+    assert pgn.parse_san(my_position, "Ncb5") == move.Move.from_uci("c3b5")
+
+
+def test_san():
+    my_position = position.Position("4k3/8/8/8/8/N1N5/8/R3K2R w KQ - 0 1")
+    assert pgn.san(my_position, move.Move.from_uci("a3b5")) == "Nab5"
+    assert pgn.san(my_position, move.Move.from_uci("e1g1")) == "O-O"
+    assert pgn.san(my_position, move.Move.from_uci("h1h8")) == "Rh8+"
+    assert pgn.san(my_position, move.Move.from_uci("a1a8")) == "Ra8+"
+
+    my_position = position.Position("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    assert pgn.san(my_position, move.Move.from_uci("a1a8")) == "Ra8#"
+
+    my_position = position.Position("4k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+    assert pgn.san(my_position, move.Move.from_uci("a7a8q")) == "a8=Q+"
+
+
+def test_san_moves():
+    my_position = position.Position()
+    my_moves = [move.Move.from_uci(uci) for uci in ["e2e4", "e7e5", "g1f3"]]
+    assert pgn.san_moves(my_position, my_moves) == "1. e4 e5 2. Nf3"
+    assert my_position.fen() == position.INITIAL_FEN
@@ -19,3 +19,8 @@ def test_color():
 
 def test_piece_eq():
     assert piece.Piece.from_symbol("P") == piece.Piece.from_symbol("P")
+
+
+def test_piece_interned():
+    assert piece.Piece.from_symbol("Q") is piece.Piece(piece.WHITE, piece.QUEEN)
+    assert len({piece.Piece.from_symbol(x) for x in "PNBRQKpnbrqk."}) == 13
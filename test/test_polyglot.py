@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from tetra import bitboard, move, polyglot, position
+
+# Keys from the polyglot book format description
+POLYGLOT_KEYS = [
+    ([], 0x463B96181691FC9C),
+    (["e2e4"], 0x823C9B50FD114196),
+    (["e2e4", "d7d5"], 0x0756B94461C50FB0),
+    (["e2e4", "d7d5", "e4e5"], 0x662FAFB965DB29D4),
+    (["e2e4", "d7d5", "e4e5", "f7f5"], 0x22A48B5A8E47FF78),
+    (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2"], 0x652A607CA3F242C1),
+    (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2", "e8f7"], 0x00FDD303C946BDD9),
+    (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4"], 0x3C8123EA7B067637),
+    (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4", "b4c3", "a1a3"], 0x5C3F9B829B279560),
+]
+
+GAMES = [
+    "e2e4 e7e5 g1f3 b8c6 f1b5",
+    "e2e4 e7e5 g1f3 g8f6",
+    "e2e4 c7c5",
+    "d2d4 d7d5 c2c4",
+    "e2e4 e7e5 g1f3 b8c6 f1c4 g8f6 e1g1",
+]
+
+
+@pytest.mark.parametrize("backend", [position.Position, bitboard.BitboardPosition])
+def test_polyglot_key(backend):
+    for ucis, key in POLYGLOT_KEYS:
+        my_position = backend()
+        for uci in ucis:
+            my_position.push_uci(uci)
+        assert polyglot.polyglot_key(my_position) == key
+
+
+def test_encode_move():
+    my_position = position.Position("r3k2r/1P6/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    for uci, book_uci in [("e1g1", "e1h1"), ("e1c1", "e1a1"), ("b7a8n", "b7a8n")]:
+        my_move = move.Move.from_uci(uci)
+        move_int = polyglot.encode_move(my_position, my_move)
+        assert move_int & 0xFFF == (
+            move.Move.from_uci(book_uci[2:4] + book_uci[0:2]).to_int()
+        )
+        assert polyglot.decode_move(my_position, move_int) == my_move
+    assert polyglot.encode_move(my_position, move.Move.from_uci("b7b8q")) >> 12 == 4
+
+
+def test_book(tmp_path):
+    builder = polyglot.BookBuilder(max_ply=4)
+    assert builder.add_uci(GAMES + ["e2e5", ""]) == 5
+    path = tmp_path / "book.bin"
+    assert builder.write(path) == len(builder) == 9
+    assert path.stat().st_size == 9 * polyglot.ENTRY_SIZE
+
+    with polyglot.Book(path) as book:
+        assert len(book) == 9
+
+        my_position = position.Position()
+        entries = book.find_all(my_position)
+        assert {entry.move.uci(): entry.weight for entry in entries} == {
+            "e2e4": 4,
+            "d2d4": 1,
+        }
+        assert book.choose(my_position, random.Random(0)) in [
+            entry.move for entry in entries
+        ]
+
+        my_position.push_uci("e2e4")
+        my_position.push_uci("e7e5")
+        my_position.push_uci("g1f3")
+        assert [entry.move.uci() for entry in book.find_all(my_position)] == [
+            "b8c6",
+            "g8f6",
+        ]
+
+        my_position.push_uci("b8c6")
+        assert my_position not in book
+        assert book.choose(my_position) is None
+
+
+def test_book_pgn(tmp_path):
+    builder = polyglot.BookBuilder()
+    lines = ["1. e4 e5 2. Nf3 Nc6 1-0\n", "1. d4 d5 2. c4 *\n", "1. e4 e5 2. O-O *\n"]
+    assert builder.add_pgn(lines) == 2
+    assert len(builder) == 7
+
+
+def test_empty_book(tmp_path):
+    path = tmp_path / "empty.bin"
+    polyglot.BookBuilder().write(path)
+    with polyglot.Book(path) as book:
+        assert len(book) == 0
+        assert book.find_all(position.Position()) == []
+
+    path.write_bytes(b"\0" * 10)
+    with pytest.raises(ValueError):
+        polyglot.Book(path)
+
+
+def test_main(tmp_path, capsys):
+    games_path = tmp_path / "games.txt"
+    games_path.write_text("\n".join(GAMES))
+    book_path = tmp_path / "book.bin"
+    assert polyglot.main([str(games_path), "-o", str(book_path)]) == 0
+    assert "5 games" in capsys.readouterr().err
+    with polyglot.Book(book_path) as book:
+        assert len(book) == 13
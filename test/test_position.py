@@ -1,3 +1,5 @@
+import pytest
+
 from tetra import move, piece, position, square
 
 
@@ -137,3 +139,432 @@ def test_move_into_check():
     my_fen = "r2q3r/ppp1kppp/2np1n2/2b1p1B1/2B1P1b1/2NP1N2/PPP1KPPP/R2Q3R w - - 4 8"
     my_position = position.Position(my_fen)
     assert move.Move.from_uci("f3g1") not in my_position.generate_moves()
+
+
+def test_make_move_promotion():
+    my_position = position.Position("8/1P6/8/8/8/8/6k1/K7 w - - 0 1")
+    my_position.make_move(move.Move.from_uci("b7b8n"))
+    assert my_position.fen() == "1N6/8/8/8/8/8/6k1/K7 b - - 0 1"
+
+
+def test_capture_rook_castling_rights():
+    my_fen = "r3k2r/8/8/8/8/8/6B1/R3K2R w KQkq - 0 1"
+    my_position = position.Position(my_fen)
+    my_position.make_move(move.Move.from_uci("g2a8"))
+    assert my_position.castling_rights == ["K", "Q", "k"]
+
+
+def test_moves_castling_b_file():
+    my_moves = position.Position(
+        "rn2k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1"
+    ).generate_moves()
+    assert move.Move.from_uci("e8g8") in my_moves
+    assert move.Move.from_uci("e8c8") not in my_moves
+
+
+def test_unmake_move_sequence():
+    my_fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_ucis = ["a2a4", "b4a3", "e1g1", "h3g2", "d5e6", "g2f1q", "g1f1", "e8c8"]
+    my_position = position.Position(my_fen)
+    for uci in my_ucis:
+        my_position.make_move(move.Move.from_uci(uci))
+    assert (
+        my_position.fen()
+        == "2kr3r/p1ppqpb1/bn2Pnp1/4N3/4P3/p1N2Q2/1PPBBP1P/R4K2 w - - 1 5"
+    )
+
+    for _ in my_ucis:
+        my_position.unmake_move()
+    assert my_position.fen() == my_fen
+    assert my_position.position_stack == []
+
+
+def test_hash():
+    my_position = position.Position()
+    assert my_position.hash() == my_position.compute_hash()
+    assert my_position.hash() == position.Position().hash()
+
+    my_position.make_move(move.Move.from_uci("e2e4"))
+    assert my_position.hash() == my_position.compute_hash()
+    assert my_position.hash() != position.Position().hash()
+
+    my_position.unmake_move()
+    assert my_position.hash() == position.Position().hash()
+
+
+def test_hash_transposition():
+    my_position = position.Position()
+    for uci in ["g1f3", "g8f6", "f3g1", "f6g8"]:
+        my_position.make_move(move.Move.from_uci(uci))
+    assert my_position == position.Position()
+    assert len({my_position, position.Position()}) == 1
+
+
+def test_hash_ep_square():
+    # En passant only changes the hash when a capture is possible
+    my_fen = "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3"
+    assert position.Position(my_fen) != position.Position(my_fen.replace("e3", "-"))
+
+    my_fen = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+    assert position.Position(my_fen) == position.Position(my_fen.replace("e3", "-"))
+
+
+def test_hash_set_piece():
+    my_position = position.Position()
+    my_position.remove_piece(square.Square.from_name("e2"))
+    my_position.set_piece(piece.Piece.from_symbol("P"), square.Square.from_name("e4"))
+    assert my_position.hash() == my_position.compute_hash()
+
+    # Pawns beside the en passant square decide whether it's hashed
+    my_position = position.Position(
+        "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3"
+    )
+    my_position.remove_piece(square.Square.from_name("d4"))
+    assert my_position.hash() == my_position.compute_hash()
+    my_position.set_piece(piece.Piece.from_symbol("p"), square.Square.from_name("f4"))
+    assert my_position.hash() == my_position.compute_hash()
+    my_position.set_piece(piece.Piece.from_symbol("N"), square.Square.from_name("f4"))
+    assert my_position.hash() == my_position.compute_hash()
+
+
+def test_moves_pinned():
+    # The e2 knight is pinned and the d2 bishop can only slide along the pin
+    my_fen = "4r1k1/8/8/8/8/8/4N3/4K3 w - - 0 1"
+    my_moves = position.Position(my_fen).generate_moves()
+    assert not [x for x in my_moves if x.from_square.name() == "e2"]
+
+    my_fen = "4k3/8/8/b7/8/8/3B4/4K3 w - - 0 1"
+    my_moves = position.Position(my_fen).generate_moves()
+    assert [x.uci() for x in my_moves if x.from_square.name() == "d2"] == [
+        "d2c3",
+        "d2b4",
+        "d2a5",
+    ]
+
+
+def test_moves_check_evasions():
+    my_fen = "4k3/8/8/8/1b6/8/8/RN2K3 w - - 0 1"
+    my_moves = position.Position(my_fen).generate_moves()
+    assert sorted(x.uci() for x in my_moves) == [
+        "b1c3",
+        "b1d2",
+        "e1d1",
+        "e1e2",
+        "e1f1",
+        "e1f2",
+    ]
+
+
+def test_moves_double_check():
+    my_fen = "4k3/8/8/8/1b6/3n4/8/R3K3 w - - 0 1"
+    my_moves = position.Position(my_fen).generate_moves()
+    assert my_moves
+    assert all(x.from_square.name() == "e1" for x in my_moves)
+
+
+def test_moves_ep_pin():
+    # Capturing en passant would expose the king along the rank
+    my_fen = "8/8/8/K2pP2r/8/8/8/4k3 w - d6 0 2"
+    my_moves = position.Position(my_fen).generate_moves()
+    assert move.Move.from_uci("e5d6") not in my_moves
+    assert move.Move.from_uci("e5e6") in my_moves
+
+
+def test_piece_squares():
+    my_fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_position = position.Position(my_fen)
+    assert len(my_position.piece_squares[piece.WHITE]) == 16
+    assert my_position.find_king(piece.BLACK) == square.Square.from_name("e8")
+
+    for uci in ["e1c1", "b4c3", "d2c3", "e8g8"]:
+        my_position.make_move(move.Move.from_uci(uci))
+    assert my_position.find_king(piece.WHITE) == square.Square.from_name("c1")
+    assert my_position.find_king(piece.BLACK) == square.Square.from_name("g8")
+
+    my_parsed = position.Position(my_position.fen())
+    assert my_position.piece_squares == my_parsed.piece_squares
+    assert my_position.king_squares == my_parsed.king_squares
+
+    for _ in range(4):
+        my_position.unmake_move()
+    assert my_position.piece_squares == position.Position(my_fen).piece_squares
+    assert my_position.king_squares == position.Position(my_fen).king_squares
+
+
+def test_generate_captures_quiets():
+    my_fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_position = position.Position(my_fen)
+    my_captures = my_position.generate_captures()
+    my_quiets = my_position.generate_quiets()
+    assert len(my_captures) == 8
+    assert len(my_captures) + len(my_quiets) == 48
+    assert set(my_captures) | set(my_quiets) == set(my_position.generate_moves())
+
+
+def test_iter_moves():
+    my_fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_position = position.Position(my_fen)
+    hash_move = move.Move.from_uci("e1g1")
+    my_moves = list(my_position.iter_moves(hash_move=hash_move))
+    assert my_moves[0] == hash_move
+    assert len(my_moves) == 48
+    assert set(my_moves) == set(my_position.generate_moves())
+
+    # Captures come next, queen takes pawn last
+    assert my_moves[1].uci() in ("e5f7", "e5g6", "e5d7", "d5e6", "e2a6", "d2a6")
+    assert my_moves[8] == move.Move.from_uci("f3h3")
+
+    my_captures = list(my_position.iter_moves(position.CAPTURE_STAGE))
+    assert my_captures == my_moves[1:9]
+
+
+def test_iter_moves_checks_and_pins():
+    # Both stages share one search for checks and pins, with a pin or a check
+    for my_fen in [
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "4k3/8/8/8/1b6/8/3P4/4K2R w K - 0 1",
+        "4k3/8/8/8/1b6/8/8/4K2R w K - 0 1",
+    ]:
+        my_position = position.Position(my_fen)
+        calls = []
+        checks_and_pins = my_position._checks_and_pins
+        my_position._checks_and_pins = lambda: calls.append(1) or checks_and_pins()
+        my_moves = list(my_position.iter_moves())
+        assert len(calls) == 1
+        assert set(my_moves) == set(position.Position(my_fen).generate_moves())
+
+
+def test_iter_moves_hash_move():
+    my_position = position.Position()
+    hash_move = move.Move.from_uci("e2e5")
+    assert hash_move not in list(my_position.iter_moves(hash_move=hash_move))
+    assert list(my_position.iter_moves(position.HASH_MOVE_STAGE, hash_move)) == []
+
+    hash_move = move.Move.from_uci("g1f3")
+    assert list(my_position.iter_moves(position.HASH_MOVE_STAGE, hash_move)) == [
+        hash_move
+    ]
+
+
+def test_iter_moves_promotions():
+    my_position = position.Position("1n5k/P7/8/8/8/8/8/K7 w - - 0 1")
+    my_moves = [x.uci() for x in my_position.iter_moves()]
+    assert my_moves[:8] == [
+        "a7b8q",
+        "a7b8r",
+        "a7b8b",
+        "a7b8n",
+        "a7a8q",
+        "a7a8r",
+        "a7a8b",
+        "a7a8n",
+    ]
+
+
+def test_fen_round_trip():
+    fens = [
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w Kq f6 0 3",
+    ]
+    for fen in fens:
+        my_position = position.Position(fen)
+        assert my_position.fen() == fen
+        assert my_position.hash() == my_position.compute_hash()
+
+
+def test_fen_invalid():
+    fens = [
+        "",
+        "8/8/8/8/8/8/8 w - - 0 1",
+        "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "rnbqkbnr/ppppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkx - 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e9 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 one",
+    ]
+    for fen in fens:
+        with pytest.raises(ValueError):
+            position.Position(fen)
+
+
+def test_fen_many():
+    fens = [position.INITIAL_FEN, "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"]
+    positions = list(position.Position.from_fen_many(fens))
+    assert [my_position.fen() for my_position in positions] == fens
+    assert positions[0] == position.Position()
+    assert positions[0].board is not positions[1].board
+    assert list(position.Position.fens_many(positions)) == fens
+
+
+def test_to_bytes():
+    fens = [
+        position.INITIAL_FEN,
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w Kq f6 0 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 12 60",
+    ]
+    for fen in fens:
+        data = position.Position(fen).to_bytes()
+        assert len(data) == position.POSITION_SIZE == 32
+        my_position = position.Position.from_bytes(data)
+        assert my_position.fen() == fen
+        assert my_position.hash() == my_position.compute_hash()
+
+    with pytest.raises(ValueError):
+        position.Position(
+            "qqqqqqqq/qqqqqqqq/qqqqkqqq/8/8/QQQQKQQQ/QQQQQQQQ/QQQQQQQQ w - - 0 1"
+        ).to_bytes()
+
+    # Counters are encoded exactly or not at all
+    data = position.Position("8/8/8/4k3/8/8/8/R3K3 w - - 255 65535").to_bytes()
+    assert position.Position.from_bytes(data).fen().endswith(" 255 65535")
+    for fen in [
+        "8/8/8/4k3/8/8/8/R3K3 w - - 256 1",
+        "8/8/8/4k3/8/8/8/R3K3 w - - 0 65536",
+    ]:
+        with pytest.raises(ValueError):
+            position.Position(fen).to_bytes()
+
+
+def test_copy():
+    my_position = position.Position()
+    my_position.make_move(move.Move.from_uci("e2e4"))
+    my_copy = my_position.copy()
+    assert my_copy == my_position
+    assert my_copy.fen() == my_position.fen()
+    assert my_copy.move_stack == []
+
+    # Moves on the copy leave the original untouched
+    my_copy.make_move(move.Move.from_uci("e7e5"))
+    my_copy.set_piece(piece.Piece.from_symbol("Q"), square.Square.from_name("d4"))
+    assert my_position.fen() == (
+        "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+    )
+    assert (
+        my_position.generate_moves()
+        == position.Position(my_position.fen()).generate_moves()
+    )
+
+
+def test_copy_stack():
+    my_position = position.Position()
+    for uci in ["e2e4", "e7e5", "g1f3"]:
+        my_position.make_move(move.Move.from_uci(uci))
+    my_copy = my_position.copy(stack=True)
+    assert my_copy.move_stack is my_position.move_stack
+
+    # Either side copies the shared history before changing it
+    my_copy.unmake_move()
+    my_copy.make_move(move.Move.from_uci("b1c3"))
+    assert my_copy.move_stack is not my_position.move_stack
+    assert [my_move.uci() for my_move in my_position.move_stack] == [
+        "e2e4",
+        "e7e5",
+        "g1f3",
+    ]
+
+    while my_position.move_stack:
+        my_position.unmake_move()
+    assert my_position == position.Position()
+    while my_copy.move_stack:
+        my_copy.unmake_move()
+    assert my_copy.fen() == position.INITIAL_FEN
+
+
+def test_is_repetition():
+    my_position = position.Position()
+    knight_moves = ["g1f3", "g8f6", "f3g1", "f6g8"]
+    for uci in knight_moves:
+        my_position.make_move(move.Move.from_uci(uci))
+    assert my_position.is_repetition(2)
+    assert not my_position.is_repetition(3)
+
+    for uci in knight_moves:
+        my_position.make_move(move.Move.from_uci(uci))
+    assert my_position.is_repetition(3)
+    assert my_position.is_game_over()
+
+    # A pawn move ends the scan, since no earlier position can recur
+    my_position.make_move(move.Move.from_uci("e2e4"))
+    for uci in ["g8f6", "g1f3", "f6g8", "f3g1"]:
+        my_position.make_move(move.Move.from_uci(uci))
+    assert my_position.halfmove_clock == 4
+    assert my_position.is_repetition(2)
+    assert not my_position.is_repetition(3)
+
+
+def test_is_repetition_castling_rights():
+    my_position = position.Position("4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+    for uci in ["h1h2", "e8d8", "h2h1", "d8e8"]:
+        my_position.make_move(move.Move.from_uci(uci))
+    assert not my_position.is_repetition(2)
+
+
+def test_is_fifty_moves():
+    assert not position.Position("4k3/8/8/8/8/8/8/R3K3 w - - 99 80").is_fifty_moves()
+    my_position = position.Position("4k3/8/8/8/8/8/8/R3K3 w - - 99 80")
+    my_position.make_move(move.Move.from_uci("a1a2"))
+    assert my_position.is_fifty_moves()
+    assert my_position.is_game_over()
+
+
+def test_is_insufficient_material():
+    fens = {
+        "8/3k4/8/8/8/8/3K4/8 w - - 0 1": True,
+        "8/3k4/8/8/8/8/3KN3/8 w - - 0 1": True,
+        "8/3kb3/8/8/8/8/3KB3/8 w - - 0 1": False,
+        "8/3k1b2/8/8/8/8/3KB3/8 w - - 0 1": True,
+        "8/3kn3/8/8/8/8/3KB3/8 w - - 0 1": False,
+        "8/3k4/8/8/8/8/3KNN2/8 w - - 0 1": False,
+        "8/3k4/8/8/8/8/3KP3/8 w - - 0 1": False,
+    }
+    for fen, expected in fens.items():
+        assert position.Position(fen).is_insufficient_material() == expected
+
+
+def test_is_game_over():
+    assert not position.Position().is_game_over()
+    assert position.Position("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1").is_game_over()
+    assert position.Position("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1").is_game_over()
+
+
+def test_is_legal():
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_position = position.Position(fen)
+    legal_moves = set(my_position.generate_moves())
+    for from_i in square.SQUARES:
+        for to_i in square.SQUARES:
+            my_move = move.Move(square.Square(from_i), square.Square(to_i))
+            assert my_position.is_legal(my_move) == (my_move in legal_moves)
+    assert my_position.fen() == fen
+
+    # Blocked paths, pins, promotions and en passant
+    cases = {
+        ("4k3/8/8/8/8/8/8/R2NK3 w - - 0 1", "a1e1"): False,
+        ("4k3/4r3/8/8/8/8/4B3/4K3 w - - 0 1", "e2d3"): False,
+        ("4k3/4r3/8/8/8/8/4R3/4K3 w - - 0 1", "e2e7"): True,
+        ("4k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a7a8"): False,
+        ("4k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a7a8n"): True,
+        ("4k3/8/8/8/8/8/P7/4K3 w - - 0 1", "a2a3q"): False,
+        ("8/8/8/KPp4r/8/8/8/4k3 w - c6 0 1", "b5c6"): False,
+        ("8/8/8/1Pp5/8/8/8/K3k3 w - c6 0 1", "b5c6"): True,
+        ("4k3/8/8/8/8/8/8/R3K2R w Q - 0 1", "e1g1"): False,
+        ("4k3/8/8/8/8/8/8/R3K2R w Q - 0 1", "e1c1"): True,
+    }
+    for (fen, uci), expected in cases.items():
+        assert position.Position(fen).is_legal(move.Move.from_uci(uci)) == expected
+
+
+def test_push_uci():
+    my_position = position.Position()
+    assert my_position.push_uci("e2e4") == move.Move.from_uci("e2e4")
+    assert my_position.push_uci("e7e5").uci() == "e7e5"
+    assert my_position.board[square.E4] == "P"
+
+    for uci in ["e4e5", "d1h6", "e1e2x", "e2"]:
+        with pytest.raises(ValueError):
+            my_position.push_uci(uci)
+    assert len(my_position.move_stack) == 2
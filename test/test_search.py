@@ -0,0 +1,105 @@
+from tetra import bitboard, move, position, search
+
+
+def test_search_mate_in_one():
+    fen = "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+    for backend in [position.Position, bitboard.BitboardPosition]:
+        result = search.search(backend(fen), search.SearchLimits(depth=3))
+        assert result.best_move == move.Move.from_uci("h5f7")
+        assert result.score == search.MATE_SCORE - 1
+        assert result.mate_in() == 1
+
+
+def test_search_mate_in_two():
+    fen = "7k/8/5K2/8/8/8/8/6R1 w - - 0 1"
+    result = search.search(position.Position(fen), search.SearchLimits(depth=4))
+    assert result.mate_in() == 2
+    assert len(result.pv) == 3
+
+
+def test_search_wins_material():
+    fen = "4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1"
+    result = search.search(position.Position(fen), search.SearchLimits(depth=2))
+    assert result.best_move == move.Move.from_uci("d1d5")
+    assert result.score >= 400
+
+
+def test_search_no_moves():
+    result = search.search(position.Position("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"))
+    assert result.best_move is None
+    assert result.score == 0
+
+    result = search.search(position.Position("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1"))
+    assert result.best_move is None
+    assert result.score == -search.MATE_SCORE
+
+
+def test_search_restores_position():
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    my_position = position.Position(fen)
+    key = my_position.hash()
+    search.search(my_position, search.SearchLimits(depth=3))
+    assert my_position.fen() == fen
+    assert my_position.hash() == key
+
+    # Unwind moves from an iteration interrupted by the node limit
+    result = search.search(my_position, search.SearchLimits(nodes=3000))
+    assert result.nodes == 3000
+    assert result.best_move in my_position.generate_moves()
+    assert my_position.fen() == fen
+    assert my_position.move_stack == []
+
+
+def test_search_limits():
+    result = search.search(position.Position(), search.SearchLimits(depth=2))
+    assert result.depth == 2
+
+    result = search.search(position.Position(), search.SearchLimits(movetime=100))
+    assert result.depth >= 1
+    assert result.seconds < 1
+
+
+def test_search_start_clock():
+    # A clock started just before the search limits it, then is dropped
+    searcher = search.Searcher()
+    searcher.start_clock(100)
+    result = searcher.search(position.Position(), search.SearchLimits())
+    assert result.depth < search.MAX_PLY - 1
+    assert result.seconds < 1
+    assert searcher.clock is None
+
+
+def test_search_callback():
+    depths = []
+    searcher = search.Searcher()
+    searcher.search(
+        position.Position(),
+        search.SearchLimits(depth=3),
+        lambda result: depths.append(result.depth),
+    )
+    assert depths == [1, 2, 3]
+
+
+def test_transposition_table():
+    table = search.TranspositionTable(0.01)
+    assert table.size * search.TT_ENTRY_SIZE <= 0.01 * 2**20
+    assert table.probe(12345) is None
+
+    best_move = move.Move.from_uci("e2e4")
+    table.store(12345, best_move, 25, 3, search.EXACT_BOUND)
+    assert table.probe(12345) == (best_move, 25, 3, search.EXACT_BOUND)
+    assert table.hashfull() > 0
+
+    # Shallower entries don't replace deeper ones from the same search
+    table.store(12345 + table.size, None, -10, 1, search.UPPER_BOUND)
+    assert table.probe(12345) is not None
+
+    # Entries from older searches are always replaced
+    table.new_search()
+    table.store(12345 + table.size, None, -10, 1, search.UPPER_BOUND)
+    assert table.probe(12345) is None
+    assert table.probe(12345 + table.size) == (None, -10, 1, search.UPPER_BOUND)
+    assert table.stats.evictions == 1
+
+    table.clear()
+    assert table.probe(12345 + table.size) is None
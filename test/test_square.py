@@ -1,3 +1,5 @@
+import pickle
+
 from tetra import square
 
 
@@ -7,3 +9,19 @@ def test_square():
 
 def test_square_eq():
     assert square.Square.from_name("a1") == square.Square.from_name("a1")
+
+
+def test_square_interned():
+    assert square.Square.from_name("e4") is square.Square(square.E4)
+    assert len({square.Square.from_name("e4"), square.Square(square.E4)}) == 1
+
+
+def test_square_number():
+    assert square.Square.from_name("a1").number() == 0
+    assert square.Square.from_name("h8").number() == 63
+    assert square.Square.from_number(28) == square.Square.from_name("e4")
+
+
+def test_square_pickle():
+    my_square = square.Square.from_name("e4")
+    assert pickle.loads(pickle.dumps(my_square)) is my_square
@@ -0,0 +1,66 @@
+import json
+
+from tetra import bitboard, perft, position, search, stats
+
+
+def test_profile():
+    make_move = position.Position.make_move
+    with stats.profile() as profile:
+        my_position = bitboard.BitboardPosition()
+        assert perft.perft(my_position, 2) == 400
+        my_position.fen()
+    assert not stats.is_enabled()
+    assert position.Position.make_move is make_move
+
+    # Overrides calling their base method count once
+    assert profile.nodes() == 20
+    assert profile["unmake_move"].calls == 20
+    assert profile["generate_moves"].calls == 21
+    assert profile["_generate_moves"].calls == 21
+    assert profile["set_fen"].calls == 1
+    assert profile["fen"].calls == 1
+
+    data = json.loads(profile.to_json())
+    assert data["nodes"] == 20
+    assert data["methods"]["make_move"]["calls_per_node"] == 1.0
+    assert data["methods"]["make_move"]["seconds"] > 0
+
+
+def test_profile_nodes():
+    # Moves made to test en passant legality aren't nodes, so a perft counts
+    # its interior nodes, which it makes moves into, and no more
+    fen, counts = perft.PERFT_POSITIONS["position3"]
+    with stats.profile() as profile:
+        assert perft.perft(position.Position(fen), 3) == counts[2]
+    assert profile["is_into_check"].calls > 0
+    assert profile.nodes() == counts[0] + counts[1]
+
+    with stats.profile() as profile:
+        assert perft.perft(bitboard.BitboardPosition(fen), 3) == counts[2]
+    assert profile.nodes() == counts[0] + counts[1]
+
+
+def test_profile_search():
+    # Search generates moves by stage, which is counted with every node
+    for backend in stats.BACKENDS:
+        with stats.profile() as profile:
+            search.search(backend(), search.SearchLimits(depth=3))
+        nodes = profile.nodes()
+        assert nodes > 100
+        assert profile["_generate_moves"].calls > nodes // 10
+        assert profile["_generate_moves"].seconds > 0
+
+
+def test_disabled():
+    stats.PROFILE.reset()
+    perft.perft(position.Position(), 2)
+    assert stats.PROFILE.nodes() == 0
+
+    # Enabling twice wraps each method once
+    make_move = position.Position.make_move
+    stats.enable([position.Position])
+    stats.enable([position.Position])
+    perft.perft(position.Position(), 2)
+    stats.disable()
+    assert stats.PROFILE.nodes() == 20
+    assert position.Position.make_move is make_move
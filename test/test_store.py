@@ -0,0 +1,45 @@
+import pytest
+
+from tetra import bitboard, perft, position, store
+
+FENS = [fen for fen, _ in perft.PERFT_POSITIONS.values()]
+
+
+def test_position_store(tmp_path):
+    path = tmp_path / "positions.bin"
+    with store.PositionStore(path) as my_store:
+        assert len(my_store) == 0
+        assert my_store.append(position.Position(FENS[0])) == 0
+        assert my_store.extend(position.Position.from_fen_many(FENS[1:])) == 6
+        assert len(my_store) == len(FENS)
+        assert my_store[1].fen() == FENS[1]
+        assert my_store[-1].fen() == FENS[-1]
+        assert [my_position.fen() for my_position in my_store] == FENS
+
+        record = my_store.get_bytes(2)
+        assert isinstance(record, memoryview)
+        assert bytes(record) == position.Position(FENS[2]).to_bytes()
+
+        with pytest.raises(IndexError):
+            my_store[len(FENS)]
+
+        # Reads see positions appended after the file was mapped
+        assert my_store.append(position.Position()) == len(FENS)
+        assert my_store[len(FENS)] == position.Position()
+
+    assert path.stat().st_size == (len(FENS) + 1) * store.RECORD_SIZE
+
+
+def test_position_store_reopen(tmp_path):
+    path = tmp_path / "positions.bin"
+    with store.PositionStore(path) as my_store:
+        my_store.extend(position.Position.from_fen_many(FENS))
+
+    with store.PositionStore(path, bitboard.BitboardPosition) as my_store:
+        assert len(my_store) == len(FENS)
+        assert isinstance(my_store[0], bitboard.BitboardPosition)
+        assert my_store[3].fen() == FENS[3]
+
+    path.write_bytes(b"not a store")
+    with pytest.raises(ValueError):
+        store.PositionStore(path)
@@ -0,0 +1,112 @@
+import asyncio
+import io
+import time
+
+from tetra import piece, polyglot, position, uci
+
+
+async def iterate(lines):
+    for line in lines:
+        yield line
+        await asyncio.sleep(0)
+
+
+def run_session(lines, book=None):
+    output = io.StringIO()
+    engine = uci.UciEngine(output, hash_mb=1, book=book)
+    asyncio.run(engine.run(iterate(lines)))
+    return engine, output.getvalue().splitlines()
+
+
+def test_allocate_time():
+    assert uci.allocate_time(60_030) == 2000
+    assert uci.allocate_time(10_030, 1000, 10) == 1750
+    assert uci.allocate_time(100, 10_000) == 35
+    assert uci.allocate_time(0) == 1
+
+
+def test_parse_go():
+    limits, wait = uci.parse_go(["depth", "3"], piece.WHITE)
+    assert (limits.depth, limits.movetime, wait) == (3, None, False)
+
+    limits, wait = uci.parse_go(["wtime", "1000", "btime", "60030"], piece.BLACK)
+    assert (limits.movetime, wait) == (2000, False)
+
+    limits, wait = uci.parse_go(["infinite"], piece.WHITE)
+    assert (limits.depth, limits.movetime, wait) == (None, None, True)
+
+
+def test_session():
+    engine, lines = run_session(
+        [
+            "uci",
+            "isready",
+            "position startpos moves e2e4 e7e5",
+            "position startpos moves e2e4 e7e5 g1f3",
+            "go depth 2",
+            "isready",
+            "quit",
+        ]
+    )
+    assert lines[:5] == [
+        "id name tetra",
+        f"id author {uci.ENGINE_AUTHOR}",
+        f"option name Hash type spin default {uci.DEFAULT_HASH_MB} min 1 max 4096",
+        "uciok",
+        "readyok",
+    ]
+    # isready is answered while the search runs, so its order isn't fixed
+    assert lines.count("readyok") == 2
+    assert any(line.startswith("info depth 2 ") for line in lines)
+    assert len([line for line in lines if line.startswith("bestmove ")]) == 1
+    assert len(engine.position.move_stack) == 3
+    assert engine.position.turn == piece.BLACK
+
+
+def test_go_infinite_stop():
+    engine, lines = run_session(
+        ["position fen 4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1", "go infinite", "stop"]
+    )
+    assert lines[-1].startswith("bestmove d1d5")
+    assert engine.search_future is None
+
+
+def test_ponderhit():
+    # The clock starts at ponderhit, even before the search thread has begun
+    output = io.StringIO()
+    engine = uci.UciEngine(output, hash_mb=1)
+    timings = {}
+
+    async def lines():
+        yield "position startpos"
+        yield "go ponder wtime 3030 btime 3030"
+        yield "ponderhit"
+        timings["ponderhit"] = time.perf_counter()
+        while "bestmove" not in output.getvalue():
+            await asyncio.sleep(0.01)
+        timings["bestmove"] = time.perf_counter()
+
+    asyncio.run(asyncio.wait_for(engine.run(lines()), 10))
+    # The 100 ms budget, with room for a slow machine
+    assert timings["bestmove"] - timings["ponderhit"] < 1
+
+
+def test_no_legal_moves():
+    _, lines = run_session(["position fen 7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", "go"])
+    assert lines == ["bestmove 0000"]
+
+
+def test_illegal_move():
+    engine, lines = run_session(["position startpos moves e2e4 e2e4"])
+    assert lines == ["info string illegal move e2e4"]
+    assert engine.moves == ["e2e4"]
+    assert engine.position.fen() != position.INITIAL_FEN
+
+
+def test_book_move(tmp_path):
+    builder = polyglot.BookBuilder()
+    builder.add_uci(["e2e4 e7e5"])
+    builder.write(tmp_path / "book.bin")
+    with polyglot.Book(tmp_path / "book.bin") as book:
+        _, lines = run_session(["position startpos moves e2e4", "go depth 3"], book)
+    assert lines == ["bestmove e7e5"]
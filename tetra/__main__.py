@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import sys
+from typing import Optional
+
+from tetra import batch, bitbase, parallel, perft, polyglot, uci
+
+# Create command constants
+COMMANDS = {
+    "perft": perft.main,
+    "analyse": parallel.main,
+    "batch": batch.main,
+    "bitbase": bitbase.main,
+    "book": polyglot.main,
+    "uci": uci.main,
+}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: tetra {{{','.join(COMMANDS)}}} ...", file=sys.stderr)
+        return 2
+
+    return COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
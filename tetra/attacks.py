@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from tetra import piece, square
+
+# Create attack constants
+Ray = tuple[square.SquareIndex, ...]
+
+PAWN_ATTACK_DIRECTIONS = {
+    piece.WHITE: [piece.N + piece.E, piece.N + piece.W],
+    piece.BLACK: [piece.S + piece.E, piece.S + piece.W],
+}
+
+# Piece symbols by color, in piece type order from pawn to king
+COLOR_SYMBOLS = {
+    piece.WHITE: tuple("PNBRQK"),
+    piece.BLACK: tuple("pnbrqk"),
+}
+
+
+def _ray(square_i: square.SquareIndex, direction: int) -> Ray:
+    ray = []
+    j = square_i + direction
+    while square.SQUARE_NAMES[j] != "  ":
+        ray.append(j)
+        j += direction
+    return tuple(ray)
+
+
+def _leaps(square_i: square.SquareIndex, directions: list[int]) -> Ray:
+    return tuple(
+        square_i + direction
+        for direction in directions
+        if square.SQUARE_NAMES[square_i + direction] != "  "
+    )
+
+
+# Rays from each square, in the queen direction order (orthogonal first)
+RAYS = [[] for _ in range(120)]
+ORTHOGONAL_RAYS = [[] for _ in range(120)]
+DIAGONAL_RAYS = [[] for _ in range(120)]
+
+# Direction of the ray from each square to each square it reaches
+RAY_DIRECTIONS = [{} for _ in range(120)]
+
+# Leaper targets from each square
+KNIGHT_SQUARES = [() for _ in range(120)]
+KING_SQUARES = [() for _ in range(120)]
+
+# Squares from which a pawn of each color attacks each square
+PAWN_ATTACKER_SQUARES = {
+    piece.WHITE: [() for _ in range(120)],
+    piece.BLACK: [() for _ in range(120)],
+}
+
+for square_i in square.SQUARES:
+    for direction in piece.PIECE_DIRECTIONS[piece.QUEEN]:
+        ray = _ray(square_i, direction)
+        RAYS[square_i].append((direction, ray))
+        for j in ray:
+            RAY_DIRECTIONS[square_i][j] = direction
+        if direction in piece.PIECE_DIRECTIONS[piece.ROOK]:
+            ORTHOGONAL_RAYS[square_i].append(ray)
+        else:
+            DIAGONAL_RAYS[square_i].append(ray)
+
+    KNIGHT_SQUARES[square_i] = _leaps(square_i, piece.PIECE_DIRECTIONS[piece.KNIGHT])
+    KING_SQUARES[square_i] = _leaps(square_i, piece.PIECE_DIRECTIONS[piece.KING])
+
+    for color, directions in PAWN_ATTACK_DIRECTIONS.items():
+        PAWN_ATTACKER_SQUARES[color][square_i] = _leaps(
+            square_i, [-direction for direction in directions]
+        )
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from tetra import perft, position, search
+
+# Create batch constants
+Record = dict[str, Any]
+
+FORMATS = ["jsonl", "csv"]
+
+# Per-process searcher, created by the pool initializer for search batches
+_searcher: Optional[search.Searcher] = None
+
+
+def op_moves(my_position: position.Position, depth: int) -> Record:
+    return {"moves": len(my_position.generate_moves())}
+
+
+def op_status(my_position: position.Position, depth: int) -> Record:
+    in_check = my_position.is_check()
+    if my_position.generate_moves():
+        status = "check" if in_check else "ok"
+    else:
+        status = "checkmate" if in_check else "stalemate"
+    return {"status": status}
+
+
+def op_perft(my_position: position.Position, depth: int) -> Record:
+    return {"nodes": perft.perft(my_position, depth)}
+
+
+def op_search(my_position: position.Position, depth: int) -> Record:
+    # Reuse the worker's table, cleared so each record is searched afresh
+    _searcher.table.clear()
+    result = _searcher.search(my_position, search.SearchLimits(depth=depth))
+    return {
+        "best_move": result.best_move.uci() if result.best_move else None,
+        "score": result.score,
+        "pv": " ".join(my_move.uci() for my_move in result.pv),
+    }
+
+
+# Operations and the fields they add to each record
+OPERATIONS = {
+    "moves": (op_moves, ["moves"]),
+    "status": (op_status, ["status"]),
+    "perft": (op_perft, ["nodes"]),
+    "search": (op_search, ["best_move", "score", "pv"]),
+}
+
+
+def parse_line(line: str) -> Optional[Record]:
+    # Read a FEN, or an EPD line with its id opcode, skipping blanks and comments
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    fields = line.split(maxsplit=4)
+    if len(fields) < 4:
+        return {"fen": line}
+
+    record = {"fen": " ".join(fields[:4])}
+    rest = fields[4] if len(fields) > 4 else ""
+    clocks = rest.split()[:2]
+    if len(clocks) == 2 and all(clock.isdigit() for clock in clocks):
+        record["fen"] += " " + " ".join(clocks)
+        return record
+
+    # EPD operations are semicolon separated, and EPD has no move clocks
+    halfmove_clock, move_number = "0", "1"
+    for operation in rest.split(";"):
+        opcode, _, operand = operation.strip().partition(" ")
+        operand = operand.strip().strip('"')
+        if opcode == "id":
+            record["id"] = operand
+        elif opcode == "hmvc" and operand.isdigit():
+            halfmove_clock = operand
+        elif opcode == "fmvn" and operand.isdigit():
+            move_number = operand
+    record["fen"] += f" {halfmove_clock} {move_number}"
+    return record
+
+
+def read_records(lines: Iterable[str]) -> Iterator[Record]:
+    for line in lines:
+        record = parse_line(line)
+        if record is not None:
+            yield record
+
+
+def chunked(records: Iterable[Record], size: int) -> Iterator[list[Record]]:
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_batch_worker(hash_mb: float) -> None:
+    global _searcher
+    _searcher = search.Searcher(search.TranspositionTable(hash_mb))
+
+
+def run_chunk(
+    task: tuple[str, int, type[position.Position], list[Record]],
+) -> list[Record]:
+    operation, depth, backend, records = task
+    function, _ = OPERATIONS[operation]
+    results = []
+    for record in records:
+        result = dict(record)
+        try:
+            result.update(function(backend(record["fen"]), depth))
+        except Exception as error:
+            # Report a bad line rather than failing the whole batch
+            result["error"] = f"{type(error).__name__}: {error}"
+        results.append(result)
+    return results
+
+
+def run_batch(
+    records: Iterable[Record],
+    operation: str,
+    depth: int = 1,
+    backend: type[position.Position] = position.Position,
+    workers: Optional[int] = None,
+    chunk_size: int = 256,
+    hash_mb: float = 16,
+) -> Iterator[Record]:
+    # Stream results in input order, keeping a bounded number of chunks in flight
+    if operation not in OPERATIONS:
+        raise ValueError(f"unknown operation: {operation}")
+    workers = workers or os.cpu_count() or 1
+    tasks = (
+        (operation, depth, backend, chunk) for chunk in chunked(records, chunk_size)
+    )
+
+    # Only searches need a table, allocated once per process
+    initializer = _init_batch_worker if operation == "search" else None
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(hash_mb)
+        for task in tasks:
+            yield from run_chunk(task)
+        return
+
+    with ProcessPoolExecutor(
+        workers, initializer=initializer, initargs=(hash_mb,)
+    ) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(run_chunk, task))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_jsonl(results: Iterable[Record], output: TextIO) -> int:
+    count = 0
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        count += 1
+    return count
+
+
+def write_csv(results: Iterable[Record], output: TextIO, operation: str) -> int:
+    _, fields = OPERATIONS[operation]
+    writer = csv.DictWriter(output, ["id", "fen", *fields, "error"])
+    writer.writeheader()
+    count = 0
+    for result in results:
+        writer.writerow(result)
+        count += 1
+    return count
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="tetra batch", description="Run an operation over a FEN or EPD file"
+    )
+    parser.add_argument("input", help="FEN or EPD file, or - for stdin")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--op", choices=list(OPERATIONS), default="moves")
+    parser.add_argument("-d", "--depth", type=int, default=1)
+    parser.add_argument(
+        "-b", "--backend", choices=list(perft.BACKENDS), default="mailbox"
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument(
+        "--hash", type=float, default=16, metavar="MB", help="search table size"
+    )
+    parser.add_argument(
+        "--format", choices=FORMATS, help="output format (default: from extension)"
+    )
+    args = parser.parse_args(argv)
+
+    output_format = args.format
+    if output_format is None:
+        output_format = "csv" if (args.output or "").endswith(".csv") else "jsonl"
+
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    output_file = (
+        sys.stdout if args.output is None else open(args.output, "w", newline="")
+    )
+    try:
+        results = run_batch(
+            read_records(input_file),
+            args.op,
+            args.depth,
+            perft.BACKENDS[args.backend],
+            args.jobs,
+            args.chunk_size,
+            args.hash,
+        )
+        if output_format == "csv":
+            count = write_csv(results, output_file, args.op)
+        else:
+            count = write_jsonl(results, output_file)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(f"{count} positions", file=sys.stderr)
+    return 0
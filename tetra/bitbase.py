@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from typing import Optional, Union
+
+from tetra import attacks, piece, position, square
+
+# Create bitbase constants
+# Endgames of two kings and one more piece, named by the stronger side first
+SIGNATURES = ["KPK", "KNK", "KBK", "KRK", "KQK"]
+BITBASE_EXTENSION = ".bitbase"
+
+# One bit per side to move, king squares and piece square, set if the side
+# with the piece wins. Square numbers run from a1 = 0 to h8 = 63.
+BITBASE_POSITIONS = 2 * 64 * 64 * 64
+BITBASE_SIZE = BITBASE_POSITIONS // 8
+
+# Results for the side to move
+WDL = int
+RESULTS = [LOSS, DRAW, WIN] = range(-1, 2)
+
+# Promotions worth trying when a pawn queens
+PROMOTION_SIGNATURES = ["KQK", "KRK"]
+
+
+def _numbers(indexes: tuple[square.SquareIndex, ...]) -> tuple[int, ...]:
+    return tuple(square.SQUARE_NUMBERS[i] for i in indexes)
+
+
+# Targets from each square number, as rays that stop at the first piece
+KING_TARGETS = [_numbers(attacks.KING_SQUARES[i]) for i in square.SQUARE_INDEXES]
+PIECE_RAYS = {
+    "P": [
+        tuple(
+            (n,)
+            for n in range(64)
+            if i in attacks.PAWN_ATTACKER_SQUARES[piece.WHITE][square.SQUARE_INDEXES[n]]
+        )
+        for i in square.SQUARE_INDEXES
+    ],
+    "N": [
+        tuple((n,) for n in _numbers(attacks.KNIGHT_SQUARES[i]))
+        for i in square.SQUARE_INDEXES
+    ],
+    "B": [
+        tuple(_numbers(ray) for ray in attacks.DIAGONAL_RAYS[i])
+        for i in square.SQUARE_INDEXES
+    ],
+    "R": [
+        tuple(_numbers(ray) for ray in attacks.ORTHOGONAL_RAYS[i])
+        for i in square.SQUARE_INDEXES
+    ],
+    "Q": [
+        tuple(_numbers(ray) for _, ray in attacks.RAYS[i])
+        for i in square.SQUARE_INDEXES
+    ],
+}
+KING_TARGET_SETS = [frozenset(targets) for targets in KING_TARGETS]
+ADJACENT = [[False] * 64 for _ in range(64)]
+for _n in range(64):
+    for _m in KING_TARGETS[_n]:
+        ADJACENT[_n][_m] = True
+
+
+def index(
+    turn: piece.Color, white_king: int, black_king: int, piece_square: int
+) -> int:
+    return ((piece_square << 6 | black_king) << 6 | white_king) << 1 | (
+        turn == piece.BLACK
+    )
+
+
+def _attacked_squares(rays: tuple[tuple[int, ...], ...], blocker: int) -> set[int]:
+    attacked = set()
+    for ray in rays:
+        for n in ray:
+            attacked.add(n)
+            if n == blocker:
+                break
+    return attacked
+
+
+def _get_bit(bits: Union[bytes, bytearray, mmap.mmap], i: int) -> bool:
+    return bool(bits[i >> 3] >> (i & 7) & 1)
+
+
+def _piece_symbol(signature: str) -> str:
+    if signature not in SIGNATURES:
+        raise ValueError(f"unsupported bitbase: {signature}")
+    return signature[1]
+
+
+def generate(
+    signature: str, bitbases: Optional[dict[str, bytearray]] = None
+) -> bytearray:
+    # Work back from checkmates: a position with white to move is won if one
+    # move reaches a won position, and with black to move if every move does
+    symbol = _piece_symbol(signature)
+    bitbases = bitbases if bitbases is not None else {}
+    rays = PIECE_RAYS[symbol]
+    piece_squares = range(8, 56) if symbol == "P" else range(64)
+    white, black = piece.WHITE, piece.BLACK
+
+    # Positions with either side to move that can arise, and white's wins
+    legal = bytearray(BITBASE_POSITIONS)
+    wins = bytearray(BITBASE_POSITIONS)
+    replies = bytearray(BITBASE_POSITIONS)
+    stack = []
+
+    # Count black's legal moves, and start from the checkmates
+    for piece_square in piece_squares:
+        piece_rays = rays[piece_square]
+        for white_king in range(64):
+            if white_king == piece_square:
+                continue
+            attacked = _attacked_squares(piece_rays, white_king)
+            guarded = attacked | KING_TARGET_SETS[white_king]
+            adjacent = ADJACENT[white_king]
+            for black_king in range(64):
+                if black_king in (white_king, piece_square) or adjacent[black_king]:
+                    continue
+                i = index(black, white_king, black_king, piece_square)
+                legal[i] = 1
+                # Black can't be left in check with white to move
+                in_check = black_king in attacked
+                legal[i - 1] = not in_check
+
+                # Taking the piece is one of the moves, unless it's defended
+                count = len(KING_TARGET_SETS[black_king] - guarded)
+                replies[i] = count
+                if count == 0 and in_check:
+                    wins[i] = 1
+                    stack.append(i)
+
+    # Pawns on the seventh also win by promoting into a won position
+    if symbol == "P":
+        promoted = []
+        for promotion in PROMOTION_SIGNATURES:
+            if promotion not in bitbases:
+                bitbases[promotion] = generate(promotion, bitbases)
+            promoted.append(bitbases[promotion])
+        for piece_square in range(48, 56):
+            for white_king in range(64):
+                for black_king in range(64):
+                    i = index(white, white_king, black_king, piece_square)
+                    if not legal[i] or piece_square + 8 in (white_king, black_king):
+                        continue
+                    child = index(black, white_king, black_king, piece_square + 8)
+                    if any(_get_bit(bits, child) for bits in promoted):
+                        wins[i] = 1
+                        stack.append(i)
+
+    # Index bits: black to move, then white king, black king and piece squares
+    while stack:
+        i = stack.pop()
+        if i & 1:
+            # Black to move and lost, so each white move into it wins
+            white_king = i >> 1 & 63
+            black_king = i >> 7 & 63
+            piece_square = i >> 13
+            base = i & ~0x7F
+            parents = [base | origin << 1 for origin in KING_TARGETS[white_king]]
+            base = i & 0x1FFE
+            parents += [
+                base | origin << 13
+                for origin in _piece_origins(
+                    symbol, piece_square, white_king, black_king
+                )
+            ]
+            for parent in parents:
+                if legal[parent] and not wins[parent]:
+                    wins[parent] = 1
+                    stack.append(parent)
+        else:
+            # White to move and winning, so black has one move fewer to escape
+            base = i & ~0x1F80 | 1
+            for origin in KING_TARGETS[i >> 7 & 63]:
+                parent = base | origin << 7
+                if legal[parent] and not wins[parent]:
+                    replies[parent] -= 1
+                    if replies[parent] == 0:
+                        wins[parent] = 1
+                        stack.append(parent)
+
+    # Pack one bit per position, gathering every eighth position per bit
+    packed = 0
+    for bit in range(8):
+        packed |= int.from_bytes(wins[bit::8], "little") << bit
+    return bytearray(packed.to_bytes(BITBASE_SIZE, "little"))
+
+
+def _piece_origins(
+    symbol: str, piece_square: int, white_king: int, black_king: int
+) -> list[int]:
+    # Empty squares the piece could have moved from
+    if symbol == "P":
+        origins = []
+        if piece_square >= 16 and piece_square - 8 not in (white_king, black_king):
+            origins.append(piece_square - 8)
+            if 24 <= piece_square < 32 and piece_square - 16 not in (
+                white_king,
+                black_king,
+            ):
+                origins.append(piece_square - 16)
+        return origins
+
+    # Other pieces move the same way back, so retrace their rays
+    origins = []
+    for ray in PIECE_RAYS[symbol][piece_square]:
+        for n in ray:
+            if n == white_king or n == black_king:
+                break
+            origins.append(n)
+    return origins
+
+
+def save(bits: bytearray, path: Union[str, os.PathLike]) -> None:
+    with open(path, "wb") as bitbase_file:
+        bitbase_file.write(bits)
+
+
+# Create bitbase class
+class Bitbase:
+    """A win or draw bitbase for one endgame, read through mmap"""
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = path
+        self.signature = os.path.basename(path).removesuffix(BITBASE_EXTENSION)
+        _piece_symbol(self.signature)
+
+        self.file = open(path, "rb")
+        if os.fstat(self.file.fileno()).st_size != BITBASE_SIZE:
+            self.file.close()
+            raise ValueError(f"{path} is not a bitbase")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self) -> Bitbase:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.data.close()
+        self.file.close()
+
+    def probe_squares(
+        self, turn: piece.Color, white_king: int, black_king: int, piece_square: int
+    ) -> WDL:
+        # Result for the side to move, with white holding the piece
+        if _get_bit(self.data, index(turn, white_king, black_king, piece_square)):
+            return WIN if turn == piece.WHITE else LOSS
+        return DRAW
+
+
+# Create bitbases class
+class Bitbases:
+    """The bitbases found in a directory, probed by a position's material"""
+
+    def __init__(self, directory: Union[str, os.PathLike]) -> None:
+        self.tables = {}
+        for signature in SIGNATURES:
+            path = os.path.join(directory, signature + BITBASE_EXTENSION)
+            if os.path.exists(path):
+                self.tables[signature] = Bitbase(path)
+
+    def __enter__(self) -> Bitbases:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            table.close()
+
+    def probe(self, my_position: position.Position) -> Optional[WDL]:
+        # Return the result for the side to move, or None outside the bitbases
+        piece_squares = my_position.piece_squares
+        if len(piece_squares[piece.WHITE]) + len(piece_squares[piece.BLACK]) != 3:
+            return None
+
+        # Look at the board from the side with the piece
+        strong = piece.WHITE if len(piece_squares[piece.WHITE]) == 2 else piece.BLACK
+        king_squares = my_position.king_squares
+        [piece_i] = piece_squares[strong] - {king_squares[strong]}
+        table = self.tables.get("K" + my_position.board[piece_i].upper() + "K")
+        if table is None:
+            return None
+
+        flip = 0 if strong == piece.WHITE else 56
+        return table.probe_squares(
+            piece.WHITE if my_position.turn == strong else piece.BLACK,
+            square.SQUARE_NUMBERS[king_squares[strong]] ^ flip,
+            square.SQUARE_NUMBERS[king_squares[3 - strong]] ^ flip,
+            square.SQUARE_NUMBERS[piece_i] ^ flip,
+        )
+
+
+def generate_files(
+    signatures: list[str], directory: Union[str, os.PathLike]
+) -> dict[str, float]:
+    # Return the seconds taken by each bitbase
+    os.makedirs(directory, exist_ok=True)
+    bitbases = {}
+    seconds = {}
+    for signature in signatures:
+        start = time.perf_counter()
+        if signature not in bitbases:
+            bitbases[signature] = generate(signature, bitbases)
+        save(
+            bitbases[signature], os.path.join(directory, signature + BITBASE_EXTENSION)
+        )
+        seconds[signature] = time.perf_counter() - start
+    return seconds
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="tetra bitbase", description="Generate endgame bitbases"
+    )
+    parser.add_argument(
+        "signatures",
+        nargs="*",
+        choices=SIGNATURES,
+        default=["KPK", "KRK", "KQK"],
+        metavar="SIGNATURE",
+        help=f"endgames to generate, from {', '.join(SIGNATURES)}",
+    )
+    parser.add_argument("-o", "--output", default=".", help="directory to write to")
+    args = parser.parse_args(argv)
+
+    for signature, seconds in generate_files(args.signatures, args.output).items():
+        print(f"{signature}: {seconds:.1f}s", file=sys.stderr)
+    return 0
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+from typing import Iterator, Optional
+
+from tetra import move, piece, position, square
+
+# Create bitboard constants
+Bitboard = int
+BitboardIndex = int
+
+BB_EMPTY = 0
+BB_ALL = 0xFFFF_FFFF_FFFF_FFFF
+BB_SQUARES = [1 << i for i in range(64)]
+
+BB_RANK_1 = 0xFF
+BB_RANK_3 = BB_RANK_1 << 16
+BB_RANK_6 = BB_RANK_1 << 40
+BB_RANK_8 = BB_RANK_1 << 56
+
+# Bitboard indexes are square numbers, from a1 = 0 to h8 = 63
+BB_TO_MAILBOX = square.SQUARE_INDEXES
+MAILBOX_TO_BB = square.SQUARE_NUMBERS
+
+BB_SQUARE_OBJECTS = [square.Square(square_i) for square_i in BB_TO_MAILBOX]
+
+SYMBOL_PIECES = {
+    symbol: (piece_i.color, piece_i.piece_type)
+    for symbol in "PNBRQKpnbrqk"
+    for piece_i in [piece.Piece.from_symbol(symbol)]
+}
+
+PROMOTION_TYPES = [piece.QUEEN, piece.ROOK, piece.BISHOP, piece.KNIGHT]
+PROMOTION_PIECES = {
+    color: [piece.Piece(color, piece_type) for piece_type in PROMOTION_TYPES]
+    for color in (piece.WHITE, piece.BLACK)
+}
+
+KNIGHT_STEPS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+KING_STEPS = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+ROOK_STEPS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+BISHOP_STEPS = [(1, 1), (-1, 1), (-1, -1), (1, -1)]
+
+
+def _step_attacks(i: BitboardIndex, steps: list[tuple[int, int]]) -> Bitboard:
+    attacks = BB_EMPTY
+    for rank_step, file_step in steps:
+        rank, file = (i >> 3) + rank_step, (i & 7) + file_step
+        if 0 <= rank < 8 and 0 <= file < 8:
+            attacks |= BB_SQUARES[rank * 8 + file]
+    return attacks
+
+
+def _slide_attacks(
+    i: BitboardIndex, occupied: Bitboard, steps: list[tuple[int, int]]
+) -> Bitboard:
+    attacks = BB_EMPTY
+    for rank_step, file_step in steps:
+        rank, file = (i >> 3) + rank_step, (i & 7) + file_step
+        while 0 <= rank < 8 and 0 <= file < 8:
+            attacks |= BB_SQUARES[rank * 8 + file]
+            if occupied & BB_SQUARES[rank * 8 + file]:
+                break
+            rank, file = rank + rank_step, file + file_step
+    return attacks
+
+
+def _slide_mask(i: BitboardIndex, steps: list[tuple[int, int]]) -> Bitboard:
+    # Edge squares never block, so leave them out of the occupancy key
+    mask = BB_EMPTY
+    for rank_step, file_step in steps:
+        rank, file = (i >> 3) + rank_step, (i & 7) + file_step
+        while 0 <= rank + rank_step < 8 and 0 <= file + file_step < 8:
+            mask |= BB_SQUARES[rank * 8 + file]
+            rank, file = rank + rank_step, file + file_step
+    return mask
+
+
+def _slide_table(
+    i: BitboardIndex, mask: Bitboard, steps: list[tuple[int, int]]
+) -> dict[Bitboard, Bitboard]:
+    # Enumerate every subset of the mask (Carry-Rippler)
+    table = {}
+    subset = BB_EMPTY
+    while True:
+        table[subset] = _slide_attacks(i, subset, steps)
+        subset = (subset - mask) & mask
+        if subset == BB_EMPTY:
+            break
+    return table
+
+
+KNIGHT_ATTACKS = [_step_attacks(i, KNIGHT_STEPS) for i in range(64)]
+KING_ATTACKS = [_step_attacks(i, KING_STEPS) for i in range(64)]
+PAWN_ATTACKS = [
+    [BB_EMPTY for _ in range(64)],
+    [_step_attacks(i, [(1, 1), (1, -1)]) for i in range(64)],
+    [_step_attacks(i, [(-1, 1), (-1, -1)]) for i in range(64)],
+]
+
+# Sliding attacks are looked up by the masked occupancy, as with magic
+# bitboards, but a dict per square stands in for the magic multiplication
+ROOK_MASKS = [_slide_mask(i, ROOK_STEPS) for i in range(64)]
+BISHOP_MASKS = [_slide_mask(i, BISHOP_STEPS) for i in range(64)]
+ROOK_ATTACKS = [_slide_table(i, ROOK_MASKS[i], ROOK_STEPS) for i in range(64)]
+BISHOP_ATTACKS = [_slide_table(i, BISHOP_MASKS[i], BISHOP_STEPS) for i in range(64)]
+
+
+def _between_and_line(i: BitboardIndex, j: BitboardIndex) -> tuple[Bitboard, Bitboard]:
+    for steps, attacks in (
+        (ROOK_STEPS, ROOK_ATTACKS[i][BB_EMPTY]),
+        (BISHOP_STEPS, BISHOP_ATTACKS[i][BB_EMPTY]),
+    ):
+        if attacks & BB_SQUARES[j]:
+            between = _slide_attacks(i, BB_SQUARES[j], steps) & _slide_attacks(
+                j, BB_SQUARES[i], steps
+            )
+            line = (attacks & _slide_attacks(j, BB_EMPTY, steps)) | (
+                BB_SQUARES[i] | BB_SQUARES[j]
+            )
+            return between, line
+    return BB_EMPTY, BB_EMPTY
+
+
+BETWEEN = [[BB_EMPTY for _ in range(64)] for _ in range(64)]
+LINE = [[BB_EMPTY for _ in range(64)] for _ in range(64)]
+for i in range(64):
+    for j in range(64):
+        if i != j:
+            BETWEEN[i][j], LINE[i][j] = _between_and_line(i, j)
+
+
+def rook_attacks(i: BitboardIndex, occupied: Bitboard) -> Bitboard:
+    return ROOK_ATTACKS[i][occupied & ROOK_MASKS[i]]
+
+
+def bishop_attacks(i: BitboardIndex, occupied: Bitboard) -> Bitboard:
+    return BISHOP_ATTACKS[i][occupied & BISHOP_MASKS[i]]
+
+
+def lsb(bb: Bitboard) -> BitboardIndex:
+    return (bb & -bb).bit_length() - 1
+
+
+def scan(bb: Bitboard) -> Iterator[BitboardIndex]:
+    while bb:
+        bit = bb & -bb
+        yield bit.bit_length() - 1
+        bb ^= bit
+
+
+# Create bitboard position class
+class BitboardPosition(position.Position):
+    """A chess position with bitboards per piece type and color"""
+
+    def set_position(
+        self,
+        board: list[piece.PieceSymbol],
+        turn: piece.Color,
+        castling_rights: list[str],
+        ep_square: Optional[square.Square],
+        halfmove_clock: int,
+        move_number: int,
+    ) -> None:
+        super().set_position(
+            board, turn, castling_rights, ep_square, halfmove_clock, move_number
+        )
+
+        # Set bitboards
+        self.pieces = [[BB_EMPTY for _ in piece.PIECE_TYPES] for _ in piece.COLORS]
+        self.occupied_co = [BB_EMPTY for _ in piece.COLORS]
+        self.occupied = BB_EMPTY
+        for i in range(64):
+            symbol = self.board[BB_TO_MAILBOX[i]]
+            if symbol != ".":
+                self._toggle(symbol, i)
+
+    def copy(self, stack: bool = False) -> BitboardPosition:
+        my_position = super().copy(stack)
+        my_position.pieces = [pieces.copy() for pieces in self.pieces]
+        my_position.occupied_co = self.occupied_co.copy()
+        return my_position
+
+    def set_piece(self, piece: piece.Piece, square: square.Square) -> None:
+        super().set_piece(piece, square)
+        self._toggle(piece.symbol(), MAILBOX_TO_BB[square.index])
+
+    def remove_piece(self, square: square.Square) -> None:
+        symbol = self.board[square.index]
+        if symbol != ".":
+            self._toggle(symbol, MAILBOX_TO_BB[square.index])
+        super().remove_piece(square)
+
+    def make_move(self, move: move.Move) -> None:
+        super().make_move(move)
+        self._toggle_move(move, self.position_stack[-1])
+
+    def unmake_move(self) -> None:
+        self._toggle_move(self.move_stack[-1], self.position_stack[-1])
+        super().unmake_move()
+
+    def _toggle(self, symbol: piece.PieceSymbol, i: BitboardIndex) -> None:
+        color, piece_type = SYMBOL_PIECES[symbol]
+        bit = BB_SQUARES[i]
+        self.pieces[color][piece_type] ^= bit
+        self.occupied_co[color] ^= bit
+        self.occupied ^= bit
+
+    def _toggle_move(self, move: move.Move, state: position.PositionState) -> None:
+        # Toggling is its own inverse, so make and unmake share this
+        moved_piece = state.moved_piece
+        self._toggle(moved_piece, MAILBOX_TO_BB[move.from_square.index])
+        if state.captured_piece != ".":
+            self._toggle(state.captured_piece, MAILBOX_TO_BB[state.capture_square])
+
+        if move.promotion is not None:
+            moved_piece = move.promotion.symbol()
+        self._toggle(moved_piece, MAILBOX_TO_BB[move.to_square.index])
+
+        if state.rook_move is not None:
+            rook_symbol = "R" if moved_piece == "K" else "r"
+            for rook_square in state.rook_move:
+                self._toggle(rook_symbol, MAILBOX_TO_BB[rook_square])
+
+    def attackers_mask(
+        self, attacking_color: piece.Color, i: BitboardIndex, occupied: Bitboard
+    ) -> Bitboard:
+        pieces = self.pieces[attacking_color]
+        queens = pieces[piece.QUEEN]
+        return (
+            (KNIGHT_ATTACKS[i] & pieces[piece.KNIGHT])
+            | (KING_ATTACKS[i] & pieces[piece.KING])
+            | (PAWN_ATTACKS[3 - attacking_color][i] & pieces[piece.PAWN])
+            | (bishop_attacks(i, occupied) & (pieces[piece.BISHOP] | queens))
+            | (rook_attacks(i, occupied) & (pieces[piece.ROOK] | queens))
+        )
+
+    def pinned_mask(self, color: piece.Color, king: BitboardIndex) -> Bitboard:
+        pieces = self.pieces[3 - color]
+        queens = pieces[piece.QUEEN]
+        snipers = (ROOK_ATTACKS[king][BB_EMPTY] & (pieces[piece.ROOK] | queens)) | (
+            BISHOP_ATTACKS[king][BB_EMPTY] & (pieces[piece.BISHOP] | queens)
+        )
+
+        pinned = BB_EMPTY
+        for sniper in scan(snipers):
+            blockers = BETWEEN[king][sniper] & self.occupied
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers & self.occupied_co[color]
+        return pinned
+
+    def _checks_and_pins(self) -> tuple[Bitboard, Bitboard]:
+        us = self.turn
+        king = lsb(self.pieces[us][piece.KING])
+        checkers = self.attackers_mask(3 - us, king, self.occupied)
+        return checkers, self.pinned_mask(us, king)
+
+    def _generate_moves(
+        self,
+        captures: bool = True,
+        quiets: bool = True,
+        from_squares: Optional[list[square.SquareIndex]] = None,
+        checks_and_pins: Optional[tuple[Bitboard, Bitboard]] = None,
+    ) -> list[move.Move]:
+        my_moves = []
+        Move = move.Move
+
+        us = self.turn
+        them = self.opposing_color()
+        pieces = self.pieces[us]
+        ours = self.occupied_co[us]
+        theirs = self.occupied_co[them]
+        occupied = self.occupied
+
+        king = lsb(pieces[piece.KING])
+        if checks_and_pins is None:
+            checks_and_pins = self._checks_and_pins()
+        checkers, pinned = checks_and_pins
+
+        # Restrict moving pieces and targets to the requested ones
+        from_mask = BB_ALL
+        if from_squares is not None:
+            from_mask = BB_EMPTY
+            for square_i in from_squares:
+                from_mask |= BB_SQUARES[MAILBOX_TO_BB[square_i]]
+
+        stage_mask = BB_EMPTY
+        if captures:
+            stage_mask |= theirs
+        if quiets:
+            stage_mask |= BB_ALL & ~occupied
+
+        # Add king moves, with the king lifted off its square
+        king_occupied = occupied ^ BB_SQUARES[king]
+        if from_mask & BB_SQUARES[king]:
+            for j in scan(KING_ATTACKS[king] & stage_mask):
+                if not self.attackers_mask(them, j, king_occupied):
+                    my_moves.append(Move(BB_SQUARE_OBJECTS[king], BB_SQUARE_OBJECTS[j]))
+
+        # Only the king can answer a double check
+        if checkers & (checkers - 1):
+            return my_moves
+
+        # Restrict targets to capturing or blocking a single checker
+        if checkers:
+            targets = (checkers | BETWEEN[king][lsb(checkers)]) & stage_mask
+        else:
+            targets = stage_mask
+
+        # Add knight moves, pinned knights can never move
+        for i in scan(pieces[piece.KNIGHT] & ~pinned & from_mask):
+            for j in scan(KNIGHT_ATTACKS[i] & targets):
+                my_moves.append(Move(BB_SQUARE_OBJECTS[i], BB_SQUARE_OBJECTS[j]))
+
+        # Add sliding moves
+        queens = pieces[piece.QUEEN]
+        for sliders, attacks in (
+            (pieces[piece.BISHOP] | queens, bishop_attacks),
+            (pieces[piece.ROOK] | queens, rook_attacks),
+        ):
+            for i in scan(sliders & from_mask):
+                to_mask = attacks(i, occupied) & targets
+                if pinned & BB_SQUARES[i]:
+                    to_mask &= LINE[king][i]
+                for j in scan(to_mask):
+                    my_moves.append(Move(BB_SQUARE_OBJECTS[i], BB_SQUARE_OBJECTS[j]))
+
+        # Add pawn moves
+        if us == piece.WHITE:
+            push, double_rank, promotion_rank = 8, BB_RANK_3, BB_RANK_8
+        else:
+            push, double_rank, promotion_rank = -8, BB_RANK_6, BB_RANK_1
+        promotions = PROMOTION_PIECES[us]
+        empty = ~occupied
+
+        for i in scan(pieces[piece.PAWN] & from_mask):
+            to_mask = PAWN_ATTACKS[us][i] & theirs
+            single = BB_SQUARES[i + push] & empty
+            if single:
+                to_mask |= single
+                if single & double_rank:
+                    to_mask |= BB_SQUARES[i + push + push] & empty
+
+            to_mask &= targets
+            if pinned & BB_SQUARES[i]:
+                to_mask &= LINE[king][i]
+
+            for j in scan(to_mask):
+                if BB_SQUARES[j] & promotion_rank:
+                    for promotion in promotions:
+                        my_moves.append(
+                            Move(BB_SQUARE_OBJECTS[i], BB_SQUARE_OBJECTS[j], promotion)
+                        )
+                else:
+                    my_moves.append(Move(BB_SQUARE_OBJECTS[i], BB_SQUARE_OBJECTS[j]))
+
+        # Add en passant captures, checked by replaying the occupancy change
+        if self.ep_square is not None and captures:
+            j = MAILBOX_TO_BB[self.ep_square.index]
+            captured = BB_SQUARES[j - push]
+            for i in scan(PAWN_ATTACKS[them][j] & pieces[piece.PAWN] & from_mask):
+                ep_occupied = (occupied ^ BB_SQUARES[i] ^ captured) | BB_SQUARES[j]
+                if not self.attackers_mask(them, king, ep_occupied) & ~captured:
+                    my_moves.append(Move(BB_SQUARE_OBJECTS[i], BB_SQUARE_OBJECTS[j]))
+
+        # Add castling moves
+        if not checkers and quiets and from_mask & BB_SQUARES[king]:
+            my_moves.extend(self._castling_moves(us, them))
+
+        return my_moves
+
+    def _castling_moves(self, us: piece.Color, them: piece.Color) -> list[move.Move]:
+        castling_moves = []
+        rank = 0 if us == piece.WHITE else 56
+        kingside, queenside = ("K", "Q") if us == piece.WHITE else ("k", "q")
+
+        for right, empty, safe, j in (
+            (kingside, (5, 6), (5, 6), 6),
+            (queenside, (1, 2, 3), (2, 3), 2),
+        ):
+            if right not in self.castling_rights:
+                continue
+            if any(self.occupied & BB_SQUARES[rank + k] for k in empty):
+                continue
+            if any(self.attackers_mask(them, rank + k, self.occupied) for k in safe):
+                continue
+            castling_moves.append(
+                move.Move(BB_SQUARE_OBJECTS[rank + 4], BB_SQUARE_OBJECTS[rank + j])
+            )
+
+        return castling_moves
+
+    def find_king(self, color: piece.Color) -> square.Square:
+        return BB_SQUARE_OBJECTS[lsb(self.pieces[color][piece.KING])]
+
+    def find_attackers(
+        self, attacking_color: piece.Color, target_square: square.Square
+    ) -> list[square.Square]:
+        i = MAILBOX_TO_BB[target_square.index]
+        attackers = self.attackers_mask(attacking_color, i, self.occupied)
+
+        # Order attackers by piece type, like the mailbox search
+        pieces = self.pieces[attacking_color]
+        return [
+            BB_SQUARE_OBJECTS[j]
+            for piece_type in piece.PIECE_TYPES[1:]
+            for j in scan(attackers & pieces[piece_type])
+        ]
+
+    def is_attacked(
+        self, attacking_color: piece.Color, target_square: square.Square
+    ) -> bool:
+        i = MAILBOX_TO_BB[target_square.index]
+        return self.attackers_mask(attacking_color, i, self.occupied) != BB_EMPTY
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+from tetra import move, position
+
+# Create cache constants
+REPLACEMENT_POLICIES = ["always", "depth"]
+
+# Bytes per perft table entry: key, node count and depth
+PERFT_ENTRY_SIZE = 8 + 8 + 1
+
+
+# Create cache stats class
+class CacheStats:
+    """Hit, miss and eviction counts of a cache"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"CacheStats(hits={self.hits}, misses={self.misses}, "
+            f"stores={self.stores}, evictions={self.evictions})"
+        )
+
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes > 0 else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }
+
+
+# Create perft table class
+class PerftTable:
+    """A fixed-size hash table of perft node counts by position and depth"""
+
+    def __init__(self, size_mb: float = 16, replacement: str = "depth") -> None:
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"unknown replacement policy: {replacement}")
+
+        # Round the entry count down to a power of two, so keys index by mask
+        entries = max(1, int(size_mb * 2**20) // PERFT_ENTRY_SIZE)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.replacement = replacement
+
+        self.keys = array("Q", bytes(8 * self.size))
+        self.nodes = array("Q", bytes(8 * self.size))
+        self.depths = array("B", bytes(self.size))
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return self.size - self.depths.count(0)
+
+    def probe(self, key: position.ZobristKey, depth: int) -> Optional[int]:
+        i = key & self.mask
+        if self.depths[i] == depth and self.keys[i] == key:
+            self.stats.hits += 1
+            return self.nodes[i]
+
+        self.stats.misses += 1
+        return None
+
+    def store(self, key: position.ZobristKey, depth: int, nodes: int) -> None:
+        # Depth 0 marks an empty slot, so only depths from 1 are stored
+        i = key & self.mask
+        old_depth = self.depths[i]
+        if old_depth:
+            if self.replacement == "depth" and depth < old_depth:
+                return
+            if self.keys[i] != key:
+                self.stats.evictions += 1
+
+        self.keys[i] = key
+        self.nodes[i] = nodes
+        self.depths[i] = depth
+        self.stats.stores += 1
+
+    def clear(self) -> None:
+        self.depths = array("B", bytes(self.size))
+        self.stats = CacheStats()
+
+    def hashfull(self) -> int:
+        # Permille of used entries, sampled from the first thousand
+        sample = self.depths[: min(1000, self.size)]
+        return 1000 * (len(sample) - sample.count(0)) // len(sample)
+
+
+# Create move cache class
+class MoveCache:
+    """A least recently used cache of generated moves by position"""
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def generate_moves(self, my_position: position.Position) -> list[move.Move]:
+        key = my_position.hash()
+        my_moves = self.entries.get(key)
+        if my_moves is not None:
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            return list(my_moves)
+
+        self.stats.misses += 1
+        my_moves = tuple(my_position.generate_moves())
+        self.entries[key] = my_moves
+        self.stats.stores += 1
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+        return list(my_moves)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.stats = CacheStats()
@@ -4,11 +4,16 @@ from typing import Optional
 
 from tetra import piece, square
 
+# Create move constants
+MoveInt = int
+
 
 # Create move class
 class Move:
     """A chess move"""
 
+    __slots__ = ("from_square", "to_square", "promotion")
+
     def __init__(
         self,
         from_square: square.Square,
@@ -19,6 +24,9 @@ class Move:
         self.to_square = to_square
         self.promotion = promotion
 
+    def __reduce__(self) -> tuple:
+        return (Move, (self.from_square, self.to_square, self.promotion))
+
     def __repr__(self) -> str:
         return f"Move.from_uci('{self.uci()}')"
 
@@ -35,6 +43,9 @@ class Move:
         else:
             return NotImplemented
 
+    def __hash__(self) -> int:
+        return self.to_int()
+
     def uci(self) -> str:
         if self.promotion is None:
             promotion_str = ""
@@ -61,3 +72,24 @@ class Move:
             promotion = None
 
         return cls(from_square, to_square, promotion)
+
+    def to_int(self) -> MoveInt:
+        # Pack from and to square numbers and the promotion type into 16 bits
+        move_int = self.from_square.number() | self.to_square.number() << 6
+        if self.promotion is not None:
+            move_int |= self.promotion.piece_type << 12
+        return move_int
+
+    @classmethod
+    def from_int(cls, move_int: MoveInt) -> Move:
+        from_square = square.Square.from_number(move_int & 63)
+        to_square = square.Square.from_number(move_int >> 6 & 63)
+
+        promotion_type = move_int >> 12
+        if promotion_type:
+            color = piece.WHITE if to_square.rank() == 8 else piece.BLACK
+            promotion = piece.Piece(color, promotion_type)
+        else:
+            promotion = None
+
+        return cls(from_square, to_square, promotion)
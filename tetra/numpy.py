@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("tetra.numpy requires numpy (pip install numpy)") from None
+
+from tetra import position, store
+
+# Create plane constants
+# Planes are indexed [rank][file] from a1, so square number n is [n >> 3][n & 7]
+PIECE_PLANES = 12
+TURN_PLANE = 12
+CASTLING_PLANES = [13, 14, 15, 16]
+EP_PLANE = 17
+PLANES = 18
+
+# Piece plane by 4-bit piece code, in PNBRQKpnbrqk order, or -1 for no piece
+CODE_PLANES = np.full(16, -1, dtype=np.int8)
+for _symbol, _code in position.PIECE_CODES.items():
+    CODE_PLANES[_code] = "PNBRQKpnbrqk".index(_symbol)
+
+Records = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+def encode_positions(positions: Iterable[position.Position]) -> np.ndarray:
+    # Pack positions into an (N, 32) array of their binary encodings
+    data = b"".join(my_position.to_bytes() for my_position in positions)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, position.POSITION_SIZE)
+
+
+def allocate(count: int, dtype: np.dtype = np.uint8) -> np.ndarray:
+    return np.zeros((count, PLANES, 8, 8), dtype=dtype)
+
+
+def planes_from_bytes(
+    records: Records,
+    out: Optional[np.ndarray] = None,
+    dtype: np.dtype = np.uint8,
+) -> np.ndarray:
+    # Decode packed positions into planes, reusing out when it's large enough
+    records = np.frombuffer(records, dtype=np.uint8).reshape(-1, position.POSITION_SIZE)
+    count = len(records)
+    if out is None:
+        out = allocate(count, dtype)
+    elif out.shape[0] < count or out.shape[1:] != (PLANES, 8, 8):
+        raise ValueError(f"out must have shape (>={count}, {PLANES}, 8, 8)")
+    planes = out[:count]
+
+    # The k-th occupied square holds the k-th piece code
+    occupied = np.unpackbits(records[:, :8], axis=1, bitorder="little")
+    packed = records[:, 8:24]
+    codes = np.empty((count, 32), dtype=np.uint8)
+    codes[:, 0::2] = packed & 15
+    codes[:, 1::2] = packed >> 4
+    order = np.cumsum(occupied, axis=1, dtype=np.int16) - 1
+    np.clip(order, 0, 31, out=order)
+    square_codes = np.take_along_axis(codes, order, axis=1) * occupied
+
+    # One-hot piece planes
+    square_planes = CODE_PLANES[square_codes]
+    np.equal(
+        square_planes[:, None, :],
+        np.arange(PIECE_PLANES, dtype=np.int8)[None, :, None],
+        out=planes[:, :PIECE_PLANES].reshape(count, PIECE_PLANES, 64),
+        casting="unsafe",
+    )
+
+    # Constant planes for the turn and each castling right
+    flags = records[:, 24]
+    planes[:, TURN_PLANE] = ((flags & 1) == 0)[:, None, None]
+    for k, plane in enumerate(CASTLING_PLANES):
+        planes[:, plane] = ((flags >> (k + 1)) & 1)[:, None, None]
+
+    # En passant square, on rank 6 with white to move and rank 3 with black
+    planes[:, EP_PLANE] = 0
+    ep_files = records[:, 25].astype(np.int16)
+    ep_positions = np.nonzero(ep_files)[0]
+    ep_ranks = np.where(flags[ep_positions] & 1, 2, 5)
+    planes[ep_positions, EP_PLANE, ep_ranks, ep_files[ep_positions] - 1] = 1
+    return planes
+
+
+def positions_to_planes(
+    positions: Iterable[position.Position],
+    out: Optional[np.ndarray] = None,
+    dtype: np.dtype = np.uint8,
+) -> np.ndarray:
+    return planes_from_bytes(encode_positions(positions), out, dtype)
+
+
+def store_to_planes(
+    position_store: store.PositionStore,
+    start: int = 0,
+    stop: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
+    dtype: np.dtype = np.uint8,
+) -> np.ndarray:
+    # Read records straight from the mapped file
+    return planes_from_bytes(position_store.get_bytes_range(start, stop), out, dtype)
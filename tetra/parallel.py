@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Optional
+
+from tetra import position, search
+
+# Create parallel constants
+SCHEDULES = ["static", "dynamic"]
+
+# Per-process searcher, created by the pool initializer
+_searcher: Optional[search.Searcher] = None
+
+
+def root_children(my_position: position.Position) -> list[tuple[str, str, int]]:
+    # UCI move, child FEN and child move count of each root move
+    children = []
+    for my_move in my_position.generate_moves():
+        my_position.make_move(my_move)
+        children.append(
+            (my_move.uci(), my_position.fen(), len(my_position.generate_moves()))
+        )
+        my_position.unmake_move()
+    return children
+
+
+def map_tasks(
+    function: Callable[[Any], Any],
+    tasks: list[Any],
+    workers: Optional[int] = None,
+    schedule: str = "dynamic",
+    weights: Optional[list[int]] = None,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: tuple = (),
+) -> list[Any]:
+    # Run tasks across processes and return their results in task order
+    if schedule not in SCHEDULES:
+        raise ValueError(f"unknown schedule: {schedule}")
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(
+        workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        # Hand each worker one contiguous chunk of tasks
+        if schedule == "static":
+            chunksize = max(1, -(-len(tasks) // workers))
+            return list(executor.map(function, tasks, chunksize=chunksize))
+
+        # Queue single tasks, heaviest first, so idle workers take the next one
+        order = list(range(len(tasks)))
+        if weights is not None:
+            order.sort(key=lambda k: weights[k], reverse=True)
+        futures = {executor.submit(function, tasks[k]): k for k in order}
+        results = [None for _ in tasks]
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+        return results
+
+
+def _init_search_worker(hash_mb: float) -> None:
+    global _searcher
+    _searcher = search.Searcher(search.TranspositionTable(hash_mb))
+
+
+def _search_task(
+    task: tuple[type[position.Position], str, search.SearchLimits],
+) -> search.SearchResult:
+    backend, fen, limits = task
+    return _searcher.search(backend(fen), limits)
+
+
+def analyse_root(
+    fen: str,
+    depth: int,
+    backend: type[position.Position] = position.Position,
+    workers: Optional[int] = None,
+    schedule: str = "dynamic",
+    hash_mb: float = 16,
+) -> dict[str, search.Score]:
+    # Score every root move from the side to move's point of view, best first
+    children = root_children(backend(fen))
+    limits = search.SearchLimits(depth=max(depth - 1, 1))
+    tasks = [(backend, child_fen, limits) for _, child_fen, _ in children]
+    results = map_tasks(
+        _search_task,
+        tasks,
+        workers,
+        schedule,
+        [count for _, _, count in children],
+        _init_search_worker,
+        (hash_mb,),
+    )
+
+    scores = {}
+    for (uci, _, _), result in zip(children, results):
+        # Mates are one ply further from the root than from the child
+        score = -result.score
+        if score >= search.MATE_THRESHOLD:
+            score -= 1
+        elif score <= -search.MATE_THRESHOLD:
+            score += 1
+        scores[uci] = score
+    return dict(sorted(scores.items(), key=lambda item: item[1], reverse=True))
+
+
+def analyse_positions(
+    fens: list[str],
+    limits: search.SearchLimits,
+    backend: type[position.Position] = position.Position,
+    workers: Optional[int] = None,
+    schedule: str = "dynamic",
+    hash_mb: float = 16,
+) -> list[search.SearchResult]:
+    tasks = [(backend, fen, limits) for fen in fens]
+    return map_tasks(
+        _search_task, tasks, workers, schedule, None, _init_search_worker, (hash_mb,)
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="tetra analyse", description="Score root moves across processes"
+    )
+    parser.add_argument("fen", nargs="?", default=position.INITIAL_FEN)
+    parser.add_argument("-d", "--depth", type=int, default=4)
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes")
+    parser.add_argument("--schedule", choices=SCHEDULES, default="dynamic")
+    parser.add_argument("--hash", type=float, default=16, metavar="MB")
+    args = parser.parse_args(argv)
+
+    scores = analyse_root(
+        args.fen,
+        args.depth,
+        workers=args.jobs,
+        schedule=args.schedule,
+        hash_mb=args.hash,
+    )
+    for uci, score in scores.items():
+        print(f"{uci}: {score}")
+    return 0
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Iterator, Optional
+
+from tetra import bitboard, cache, parallel, position
+
+# Create perft constants
+PerftName = str
+
+BACKENDS = {
+    "mailbox": position.Position,
+    "bitboard": bitboard.BitboardPosition,
+}
+
+# Reference positions and node counts from the Chess Programming Wiki
+# https://www.chessprogramming.org/Perft_Results
+PERFT_POSITIONS = {
+    "initial": (
+        position.INITIAL_FEN,
+        [20, 400, 8902, 197281, 4865609, 119060324],
+    ),
+    "kiwipete": (
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862, 4085603, 193690690],
+    ),
+    "position3": (
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624, 11030083],
+    ),
+    "position4": (
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467, 422333, 15833292],
+    ),
+    "position4_mirrored": (
+        "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+        [6, 264, 9467, 422333, 15833292],
+    ),
+    "position5": (
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379, 2103487, 89941194],
+    ),
+    "position6": (
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [46, 2079, 89890, 3894594, 164075551],
+    ),
+}
+
+# Per-process perft table, created by the pool initializer
+_table: Optional[cache.PerftTable] = None
+
+
+def perft(
+    my_position: position.Position,
+    depth: int,
+    table: Optional[cache.PerftTable] = None,
+) -> int:
+    if depth == 0:
+        return 1
+
+    # Reuse the counts of transposed subtrees
+    if table is not None and depth > 1:
+        nodes = table.probe(my_position.hash(), depth)
+        if nodes is not None:
+            return nodes
+
+    my_moves = my_position.generate_moves()
+
+    # Count leaves without making the last moves
+    if depth == 1:
+        return len(my_moves)
+
+    nodes = 0
+    for my_move in my_moves:
+        my_position.make_move(my_move)
+        nodes += perft(my_position, depth - 1, table)
+        my_position.unmake_move()
+
+    if table is not None:
+        table.store(my_position.hash(), depth, nodes)
+    return nodes
+
+
+def divide(
+    my_position: position.Position,
+    depth: int,
+    table: Optional[cache.PerftTable] = None,
+) -> dict[str, int]:
+    nodes = {}
+    for my_move in my_position.generate_moves():
+        my_position.make_move(my_move)
+        nodes[my_move.uci()] = perft(my_position, depth - 1, table)
+        my_position.unmake_move()
+    return nodes
+
+
+def _init_perft_worker(hash_mb: float) -> None:
+    global _table
+    _table = cache.PerftTable(hash_mb) if hash_mb > 0 else None
+
+
+def _perft_task(task: tuple[type[position.Position], str, int]) -> int:
+    backend, fen, depth = task
+    return perft(backend(fen), depth, _table)
+
+
+def parallel_divide(
+    fen: str,
+    depth: int,
+    backend: type[position.Position] = position.Position,
+    workers: Optional[int] = None,
+    schedule: str = "dynamic",
+    hash_mb: float = 0,
+) -> dict[str, int]:
+    # Count each root move's subtree in a worker process
+    children = parallel.root_children(backend(fen))
+    tasks = [(backend, child_fen, depth - 1) for _, child_fen, _ in children]
+    nodes = parallel.map_tasks(
+        _perft_task,
+        tasks,
+        workers,
+        schedule,
+        [count for _, _, count in children],
+        _init_perft_worker,
+        (hash_mb,),
+    )
+    return {uci: count for (uci, _, _), count in zip(children, nodes)}
+
+
+def parallel_perft(
+    fen: str,
+    depth: int,
+    backend: type[position.Position] = position.Position,
+    workers: Optional[int] = None,
+    schedule: str = "dynamic",
+    hash_mb: float = 0,
+) -> int:
+    # Shallow trees aren't worth the process overhead
+    if depth <= 2:
+        return perft(backend(fen), depth)
+    return sum(
+        parallel_divide(fen, depth, backend, workers, schedule, hash_mb).values()
+    )
+
+
+def cross_check(
+    fen: str,
+    depth: int,
+    backend: type[position.Position] = bitboard.BitboardPosition,
+    reference: type[position.Position] = position.Position,
+) -> Optional[str]:
+    # Return the FEN of the first position where the move lists differ
+    return _cross_check(backend(fen), reference(fen), depth)
+
+
+def _cross_check(
+    my_position: position.Position, reference_position: position.Position, depth: int
+) -> Optional[str]:
+    my_moves = sorted(my_move.uci() for my_move in my_position.generate_moves())
+    reference_moves = sorted(
+        my_move.uci() for my_move in reference_position.generate_moves()
+    )
+    if my_moves != reference_moves or my_position.fen() != reference_position.fen():
+        return reference_position.fen()
+
+    if depth <= 1:
+        return None
+
+    for my_move in reference_position.generate_moves():
+        my_position.make_move(my_move)
+        reference_position.make_move(my_move)
+        mismatch = _cross_check(my_position, reference_position, depth - 1)
+        my_position.unmake_move()
+        reference_position.unmake_move()
+        if mismatch is not None:
+            return mismatch
+    return None
+
+
+# Create perft result class
+class PerftResult:
+    """The node count and timing of a perft run"""
+
+    def __init__(
+        self,
+        name: PerftName,
+        depth: int,
+        nodes: int,
+        seconds: float,
+        expected: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.depth = depth
+        self.nodes = nodes
+        self.seconds = seconds
+        self.expected = expected
+
+    def __repr__(self) -> str:
+        return (
+            f"PerftResult('{self.name}', depth={self.depth}, nodes={self.nodes}, "
+            f"expected={self.expected})"
+        )
+
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def is_ok(self) -> bool:
+        return self.expected is None or self.nodes == self.expected
+
+
+def run_perft(
+    name: PerftName,
+    fen: str,
+    max_depth: int,
+    expected: Optional[list[int]] = None,
+    backend: type[position.Position] = position.Position,
+    table: Optional[cache.PerftTable] = None,
+    workers: int = 1,
+    schedule: str = "dynamic",
+) -> Iterator[PerftResult]:
+    my_position = backend(fen)
+    hash_mb = table.size * cache.PERFT_ENTRY_SIZE / 2**20 if table is not None else 0
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        if workers > 1:
+            nodes = parallel_perft(fen, depth, backend, workers, schedule, hash_mb)
+        else:
+            nodes = perft(my_position, depth, table)
+        seconds = time.perf_counter() - start
+
+        expected_nodes = None
+        if expected is not None and depth <= len(expected):
+            expected_nodes = expected[depth - 1]
+
+        yield PerftResult(name, depth, nodes, seconds, expected_nodes)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="tetra perft", description="Count and time move generation nodes"
+    )
+    parser.add_argument("-d", "--depth", type=int, default=3)
+    parser.add_argument(
+        "-p",
+        "--position",
+        action="append",
+        choices=list(PERFT_POSITIONS),
+        help="reference position to run (default: all)",
+    )
+    parser.add_argument("--fen", help="run a custom position instead")
+    parser.add_argument("-b", "--backend", choices=list(BACKENDS), default="mailbox")
+    parser.add_argument(
+        "--hash",
+        type=float,
+        default=0,
+        metavar="MB",
+        help="cache subtree counts in a table of this size",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="split root moves across processes"
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=parallel.SCHEDULES,
+        default="dynamic",
+        help="hand out root moves in fixed chunks or as workers free up",
+    )
+    parser.add_argument(
+        "--divide", action="store_true", help="print node counts per root move"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="compare every node's moves against the mailbox backend",
+    )
+    args = parser.parse_args(argv)
+
+    # Select positions
+    if args.fen is not None:
+        positions = {"custom": (args.fen, None)}
+    else:
+        names = args.position or list(PERFT_POSITIONS)
+        positions = {name: PERFT_POSITIONS[name] for name in names}
+    backend = BACKENDS[args.backend]
+    table = cache.PerftTable(args.hash) if args.hash > 0 else None
+
+    # Cross-check the backend against the mailbox
+    if args.check:
+        failed = False
+        for name, (fen, _) in positions.items():
+            mismatch = cross_check(fen, args.depth, backend)
+            if mismatch is not None:
+                print(f"{name}: moves differ in {mismatch}")
+                failed = True
+            else:
+                print(f"{name}: {args.backend} matches mailbox to depth {args.depth}")
+        return 1 if failed else 0
+
+    # Divide a single depth
+    if args.divide:
+        for name, (fen, _) in positions.items():
+            if args.jobs > 1:
+                nodes = parallel_divide(
+                    fen, args.depth, backend, args.jobs, args.schedule, args.hash
+                )
+            else:
+                nodes = divide(backend(fen), args.depth, table)
+            for uci, count in nodes.items():
+                print(f"{uci}: {count}")
+            print(f"{name}: {sum(nodes.values())} nodes")
+        return 0
+
+    # Run each depth and report throughput
+    failed = False
+    for name, (fen, expected) in positions.items():
+        results = run_perft(
+            name, fen, args.depth, expected, backend, table, args.jobs, args.schedule
+        )
+        for result in results:
+            status = "" if result.expected is None else " ok"
+            if not result.is_ok():
+                status = f" FAIL (expected {result.expected})"
+                failed = True
+
+            print(
+                f"{result.name} depth {result.depth}: {result.nodes} nodes "
+                f"in {result.seconds:.3f}s ({result.nps():.0f} nps){status}"
+            )
+
+    if table is not None:
+        print(f"hash: {table.stats}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator, Optional
+
+from tetra import move, piece, position, square
+
+# Create SAN constants
+SAN_PATTERN = re.compile(r"([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?")
+SAN_SUFFIXES = "+#!?"
+CASTLING_SANS = {"O-O": "g", "O-O-O": "c", "0-0": "g", "0-0-0": "c"}
+
+# Create PGN constants
+RESULTS = ["1-0", "0-1", "1/2-1/2", "*"]
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+TOKEN_PATTERN = re.compile(r"[{}();]|\$\d+|\d+\.+|[^\s{}();.]+")
+
+
+def parse_san(my_position: position.Position, san: str) -> move.Move:
+    # Find the move from the pieces that reach the target, not a full move list
+    board = my_position.board
+    turn = my_position.turn
+    text = san.rstrip(SAN_SUFFIXES)
+
+    if text in CASTLING_SANS:
+        rank = "1" if turn == piece.WHITE else "8"
+        my_move = move.Move(
+            square.Square.from_name("e" + rank),
+            square.Square.from_name(CASTLING_SANS[text] + rank),
+        )
+        if not my_position.is_legal(my_move):
+            raise ValueError(f"illegal move in {my_position.fen()}: {san}")
+        return my_move
+
+    match = SAN_PATTERN.fullmatch(text)
+    if match is None:
+        raise ValueError(f"invalid SAN move: {san}")
+    letter, from_file, from_rank, capture, to_name, promotion_letter = match.groups()
+    to_square = square.Square.from_name(to_name)
+
+    if letter is None:
+        # Pawns come from the given file on captures, or straight back on pushes
+        if from_rank is not None or (capture is not None) != (from_file is not None):
+            raise ValueError(f"invalid SAN move: {san}")
+        if promotion_letter is not None:
+            symbol = (
+                promotion_letter if turn == piece.WHITE else promotion_letter.lower()
+            )
+            promotion = piece.Piece.from_symbol(symbol)
+        else:
+            promotion = None
+
+        backward = -1 if turn == piece.WHITE else 1
+        rank = to_square.rank() + backward
+        if not 1 < rank < 8:
+            raise ValueError(f"illegal move in {my_position.fen()}: {san}")
+        from_square = square.Square.from_name((from_file or to_name[0]) + str(rank))
+        if capture is None and board[from_square.index] == ".":
+            double_rank = 2 if turn == piece.WHITE else 7
+            if rank + backward == double_rank:
+                from_square = square.Square.from_name(to_name[0] + str(double_rank))
+        my_move = move.Move(from_square, to_square, promotion)
+        if not my_position.is_legal(my_move):
+            raise ValueError(f"illegal move in {my_position.fen()}: {san}")
+        return my_move
+
+    if promotion_letter is not None:
+        raise ValueError(f"invalid SAN move: {san}")
+
+    # Pieces that attack the target square are the ones that can move there
+    symbol = letter if turn == piece.WHITE else letter.lower()
+    my_moves = []
+    for from_square in my_position.find_attackers(turn, to_square):
+        if board[from_square.index] != symbol:
+            continue
+        if from_file is not None and from_square.file() != from_file:
+            continue
+        if from_rank is not None and from_square.rank() != int(from_rank):
+            continue
+        my_move = move.Move(from_square, to_square)
+        if my_position.is_legal(my_move):
+            my_moves.append(my_move)
+
+    if not my_moves:
+        raise ValueError(f"illegal move in {my_position.fen()}: {san}")
+    if len(my_moves) > 1:
+        raise ValueError(f"ambiguous move in {my_position.fen()}: {san}")
+    return my_moves[0]
+
+
+def san(my_position: position.Position, my_move: move.Move) -> str:
+    board = my_position.board
+    turn = my_position.turn
+    from_square = my_move.from_square
+    to_square = my_move.to_square
+    symbol = board[from_square.index]
+    target = board[to_square.index]
+
+    if (from_square.index, to_square.index) in position.CASTLING_ROOK_MOVES and (
+        symbol in "Kk"
+    ):
+        text = "O-O" if to_square.file() == "g" else "O-O-O"
+    elif symbol in "Pp":
+        text = to_square.name()
+        if from_square.file() != to_square.file():
+            text = from_square.file() + "x" + text
+        if my_move.promotion is not None:
+            text += "=" + my_move.promotion.symbol().upper()
+    else:
+        # Disambiguate from other pieces of the type that can legally move there
+        others = [
+            other
+            for other in my_position.find_attackers(turn, to_square)
+            if other != from_square
+            and board[other.index] == symbol
+            and my_position.is_legal(move.Move(other, to_square))
+        ]
+        text = symbol.upper()
+        if others:
+            if all(other.file() != from_square.file() for other in others):
+                text += from_square.file()
+            elif all(other.rank() != from_square.rank() for other in others):
+                text += str(from_square.rank())
+            else:
+                text += from_square.name()
+        if target != ".":
+            text += "x"
+        text += to_square.name()
+
+    # Only a move that gives check needs the replies generated, to spot mate
+    my_position.make_move(my_move)
+    if my_position.is_check():
+        text += "+" if my_position.generate_moves() else "#"
+    my_position.unmake_move()
+    return text
+
+
+def push_san(my_position: position.Position, san: str) -> move.Move:
+    my_move = parse_san(my_position, san)
+    my_position.make_move(my_move)
+    return my_move
+
+
+def san_moves(my_position: position.Position, my_moves: Iterable[move.Move]) -> str:
+    # Number moves from the position, leaving it unchanged
+    parts = []
+    made = 0
+    try:
+        for my_move in my_moves:
+            if my_position.turn == piece.WHITE:
+                parts.append(f"{my_position.move_number}.")
+            elif not parts:
+                parts.append(f"{my_position.move_number}...")
+            parts.append(san(my_position, my_move))
+            my_position.make_move(my_move)
+            made += 1
+    finally:
+        for _ in range(made):
+            my_position.unmake_move()
+    return " ".join(parts)
+
+
+# Create game class
+class Game:
+    """A game read from PGN, with its tag pairs, SAN moves and result"""
+
+    def __init__(
+        self,
+        headers: Optional[dict[str, str]] = None,
+        moves: Optional[list[str]] = None,
+        result: str = "*",
+    ) -> None:
+        self.headers = headers if headers is not None else {}
+        self.moves = moves if moves is not None else []
+        self.result = result
+
+    def __repr__(self) -> str:
+        white = self.headers.get("White", "?")
+        black = self.headers.get("Black", "?")
+        return f"Game({white!r} vs {black!r}, {len(self.moves)} moves, {self.result})"
+
+    def start_fen(self) -> str:
+        return self.headers.get("FEN", position.INITIAL_FEN)
+
+    def replay(
+        self, backend: type[position.Position] = position.Position
+    ) -> position.Position:
+        # Return the final position, with the game's moves on its move stack
+        my_position = backend(self.start_fen())
+        for ply, text in enumerate(self.moves):
+            try:
+                push_san(my_position, text)
+            except ValueError as error:
+                raise ValueError(f"ply {ply + 1}: {error}") from None
+        return my_position
+
+
+def read_games(lines: Iterable[str]) -> Iterator[Game]:
+    # Stream games from lines of PGN, such as an open file, one at a time
+    game = None
+    in_comment = False
+    variation_depth = 0
+
+    for line in lines:
+        if in_comment:
+            end = line.find("}")
+            if end < 0:
+                continue
+            line = line[end + 1 :]
+            in_comment = False
+
+        stripped = line.strip()
+        if not stripped or stripped[0] == "%":
+            continue
+
+        # Tag pairs start a new game once the last one has moves
+        if stripped[0] == "[" and not variation_depth:
+            match = TAG_PATTERN.match(stripped)
+            if match is not None:
+                if game is not None and game.moves:
+                    yield game
+                    game = None
+                if game is None:
+                    game = Game()
+                name, value = match.groups()
+                game.headers[name] = value.replace('\\"', '"').replace("\\\\", "\\")
+                continue
+
+        for token in TOKEN_PATTERN.findall(line):
+            if in_comment:
+                if token == "}":
+                    in_comment = False
+            elif token == "{":
+                in_comment = True
+            elif token == ";":
+                break
+            elif token == "(":
+                variation_depth += 1
+            elif token == ")":
+                variation_depth = max(variation_depth - 1, 0)
+            elif variation_depth or token[0] == "$" or token[-1] == ".":
+                continue
+            elif token in RESULTS:
+                if game is None:
+                    game = Game()
+                game.result = token
+                yield game
+                game = None
+            else:
+                if game is None:
+                    game = Game()
+                game.moves.append(token)
+
+    if game is not None and (game.moves or game.headers):
+        if game.result == "*":
+            game.result = game.headers.get("Result", "*")
+        yield game
@@ -64,13 +64,31 @@ PIECE_UNICODE = {
 }
 
 
+_piece_cache = {}
+_symbol_cache = {}
+
+
 # Create piece class
 class Piece:
     """A chess piece with type and color"""
 
-    def __init__(self, color: Color, piece_type: PieceType) -> None:
-        self.color = color
-        self.piece_type = piece_type
+    __slots__ = ("color", "piece_type", "_symbol")
+
+    def __new__(cls, color: Color, piece_type: PieceType) -> Piece:
+        # Intern pieces, so each type and color has a single instance
+        self = _piece_cache.get((color, piece_type))
+        if self is None:
+            self = super().__new__(cls)
+            self.color = color
+            self.piece_type = piece_type
+            self._symbol = PIECE_SYMBOLS[piece_type]
+            if color == WHITE:
+                self._symbol = self._symbol.upper()
+            _piece_cache[(color, piece_type)] = self
+        return self
+
+    def __reduce__(self) -> tuple:
+        return (Piece, (self.color, self.piece_type))
 
     def __repr__(self) -> str:
         return f"Piece.from_symbol('{self.symbol()}')"
@@ -84,11 +102,11 @@ class Piece:
         else:
             return NotImplemented
 
+    def __hash__(self) -> int:
+        return self.color * 8 + self.piece_type
+
     def symbol(self) -> str:
-        symbol = PIECE_SYMBOLS[self.piece_type]
-        if self.color == WHITE:
-            symbol = symbol.upper()
-        return symbol
+        return self._symbol
 
     def is_sliding(self) -> bool:
         return PIECE_SLIDING[self.piece_type]
@@ -108,6 +126,9 @@ class Piece:
 
     @classmethod
     def from_symbol(cls, symbol: PieceSymbol) -> Piece:
+        if symbol in _symbol_cache:
+            return _symbol_cache[symbol]
+
         if symbol == ".":
             color = EMPTY_COLOR
         elif symbol.isupper():
@@ -116,4 +137,5 @@ class Piece:
             color = BLACK
 
         piece_type = PIECE_SYMBOLS.index(symbol.lower())
-        return cls(color, piece_type)
+        _symbol_cache[symbol] = cls(color, piece_type)
+        return _symbol_cache[symbol]
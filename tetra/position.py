@@ -1,28 +1,139 @@
 from __future__ import annotations
 
-from typing import Optional
+import random
+import struct
+from typing import Iterable, Iterator, Optional
 
-from tetra import move, piece, square
+from tetra import attacks, evaluation, move, piece, square
 
 # Create position constants
 INITIAL_BOARD_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
 INITIAL_FEN = INITIAL_BOARD_FEN + " w KQkq - 0 1"
 
 
+# Castling rook moves by king move
+CASTLING_ROOK_MOVES = {
+    (square.E1, square.G1): (square.H1, square.F1),
+    (square.E1, square.C1): (square.A1, square.D1),
+    (square.E8, square.G8): (square.H8, square.F8),
+    (square.E8, square.C8): (square.A8, square.D8),
+}
+
+# Castling rights lost by moving from or to a square
+CASTLING_RIGHTS_SQUARES = {
+    square.E1: "KQ",
+    square.A1: "Q",
+    square.H1: "K",
+    square.E8: "kq",
+    square.A8: "q",
+    square.H8: "k",
+}
+
+# Create FEN constants
+EMPTY_BOARD = [" " for _ in range(120)]
+for _square_i in square.SQUARES:
+    EMPTY_BOARD[_square_i] = "."
+
+# Mailbox index of the a-file square of each rank, from rank 8 to rank 1
+RANK_STARTS = square.SQUARES[::8]
+
+FEN_EMPTY_RUNS = {str(run): run for run in range(1, 9)}
+FEN_SYMBOL_COLORS = {
+    **{symbol: piece.WHITE for symbol in "PNBRQK"},
+    **{symbol: piece.BLACK for symbol in "pnbrqk"},
+}
+FEN_TURNS = {"w": piece.WHITE, "b": piece.BLACK}
+FEN_CASTLING_RIGHTS = "KQkq"
+
+# Runs of empty squares, longest first, to replace with their length
+FEN_EMPTY_STRINGS = [("." * run, str(run)) for run in range(8, 0, -1)]
+
+# Create binary encoding constants
+# Occupancy by square number, 4-bit piece codes in square order, turn and
+# castling flags, en passant file, halfmove clock up to 255 and move number
+# up to 65535
+POSITION_STRUCT = struct.Struct("<Q16sBBBH3x")
+POSITION_SIZE = POSITION_STRUCT.size
+
+PIECE_CODES = {
+    **{symbol: code for code, symbol in enumerate("PNBRQK", 1)},
+    **{symbol: code for code, symbol in enumerate("pnbrqk", 9)},
+}
+CODE_SYMBOLS = {code: symbol for symbol, code in PIECE_CODES.items()}
+
+# Create move stage constants
+MoveStage = int
+MOVE_STAGES = [
+    HASH_MOVE_STAGE,
+    CAPTURE_STAGE,
+    PROMOTION_STAGE,
+    QUIET_STAGE,
+] = range(4)
+
+# Create zobrist constants, seeded so keys are stable between runs
+ZobristKey = int
+
+_zobrist_random = random.Random(0x7E7A)
+ZOBRIST_PIECES = {
+    symbol: [_zobrist_random.getrandbits(64) for _ in range(120)]
+    for symbol in "PNBRQKpnbrqk"
+}
+ZOBRIST_CASTLING = {right: _zobrist_random.getrandbits(64) for right in "KQkq"}
+ZOBRIST_EP_FILES = {file: _zobrist_random.getrandbits(64) for file in "abcdefgh"}
+ZOBRIST_TURN = _zobrist_random.getrandbits(64)
+
+
 class PositionState:
-    def __init__(self, position: Position) -> None:
-        self.board = position.board.copy()
-        self.turn = position.turn
-        self.castling_rights = position.castling_rights.copy()
-        self.ep_square = position.ep_square
-        self.halfmove_clock = position.halfmove_clock
-        self.move_number = position.move_number
+    """The changes made by a move, used to unmake it"""
+
+    __slots__ = (
+        "moved_piece",
+        "captured_piece",
+        "capture_square",
+        "castling_rights",
+        "ep_square",
+        "halfmove_clock",
+        "rook_move",
+        "zobrist_key",
+        "middlegame_score",
+        "endgame_score",
+        "phase",
+    )
+
+    def __init__(
+        self,
+        moved_piece: piece.PieceSymbol,
+        captured_piece: piece.PieceSymbol,
+        capture_square: square.SquareIndex,
+        castling_rights: list[str],
+        ep_square: Optional[square.Square],
+        halfmove_clock: int,
+        rook_move: Optional[tuple[square.SquareIndex, square.SquareIndex]],
+        zobrist_key: ZobristKey,
+        middlegame_score: evaluation.Score,
+        endgame_score: evaluation.Score,
+        phase: int,
+    ) -> None:
+        self.moved_piece = moved_piece
+        self.captured_piece = captured_piece
+        self.capture_square = capture_square
+        self.castling_rights = castling_rights
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.rook_move = rook_move
+        self.zobrist_key = zobrist_key
+        self.middlegame_score = middlegame_score
+        self.endgame_score = endgame_score
+        self.phase = phase
 
 
 # Create position class
 class Position:
     """A chess position"""
 
+    # Set on copies whose stacks are shared until one side makes or unmakes a move
+    shared_stacks = False
+
     def __init__(self, fen: Optional[str] = INITIAL_FEN) -> None:
         self.move_stack = []
         self.position_stack = []
@@ -31,6 +142,15 @@ class Position:
     def __repr__(self) -> str:
         return f"Position('{self.fen()}')"
 
+    def __eq__(self, other: Position) -> bool:
+        if isinstance(other, Position):
+            return self.zobrist_key == other.zobrist_key
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.zobrist_key
+
     def __str__(self) -> str:
         output = ""
         for i, square_i in enumerate(square.SQUARES):
@@ -41,58 +161,102 @@ class Position:
 
     def set_fen(self, fen: str) -> None:
         # Split FEN
-        [
+        fields = fen.split()
+        if len(fields) != 6:
+            raise ValueError(f"invalid FEN: {fen}")
+        (
             board_fen,
             turn_fen,
             castling_rights_fen,
             ep_square_fen,
             halfmove_clock_fen,
             move_number_fen,
-        ] = fen.split()
+        ) = fields
 
         # Set board
-        board = [" " for _ in range(120)]
-        for i in square.SQUARES:
-            board[i] = "."
-
-        square_i = 0
-        for i in board_fen:
-            if i in [str(x) for x in range(1, 9)]:
-                square_i += int(i)
-            if i.lower() in piece.PIECE_SYMBOLS:
-                board[square.SQUARES[square_i]] = i
-                square_i += 1
+        board = EMPTY_BOARD.copy()
+        ranks = board_fen.split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"invalid FEN board: {board_fen}")
+
+        for rank_start, rank_fen in zip(RANK_STARTS, ranks):
+            square_i = rank_start
+            for symbol in rank_fen:
+                run = FEN_EMPTY_RUNS.get(symbol)
+                if run is not None:
+                    square_i += run
+                elif symbol in FEN_SYMBOL_COLORS and square_i < rank_start + 8:
+                    board[square_i] = symbol
+                    square_i += 1
+                else:
+                    raise ValueError(f"invalid FEN board: {board_fen}")
+
+            if square_i != rank_start + 8:
+                raise ValueError(f"invalid FEN board: {board_fen}")
 
         # Set turn
-        if turn_fen == "w":
-            turn = piece.WHITE
-        elif turn_fen == "b":
-            turn = piece.BLACK
-
-        # Set castling_rights
-        castling_rights = []
-        if "K" in castling_rights_fen:
-            castling_rights.append("K")
-        if "Q" in castling_rights_fen:
-            castling_rights.append("Q")
-        if "k" in castling_rights_fen:
-            castling_rights.append("k")
-        if "q" in castling_rights_fen:
-            castling_rights.append("q")
+        turn = FEN_TURNS.get(turn_fen)
+        if turn is None:
+            raise ValueError(f"invalid FEN turn: {turn_fen}")
+
+        # Set castling_rights, kept in KQkq order
+        if castling_rights_fen != "-" and not set(castling_rights_fen) <= set(
+            FEN_CASTLING_RIGHTS
+        ):
+            raise ValueError(f"invalid FEN castling rights: {castling_rights_fen}")
+        castling_rights = [x for x in FEN_CASTLING_RIGHTS if x in castling_rights_fen]
 
         # Set ep_square
         ep_square_fen = ep_square_fen.lower()
-
         if ep_square_fen == "-":
             ep_square = None
         elif ep_square_fen in square.SQUARE_NAMES:
             ep_square = square.Square.from_name(ep_square_fen)
+        else:
+            raise ValueError(f"invalid FEN en passant square: {ep_square_fen}")
+
+        # Set halfmove_clock and move_number
+        if not (halfmove_clock_fen.isdigit() and move_number_fen.isdigit()):
+            raise ValueError(f"invalid FEN move counters: {fen}")
+
+        self.set_position(
+            board,
+            turn,
+            castling_rights,
+            ep_square,
+            int(halfmove_clock_fen),
+            int(move_number_fen),
+        )
 
-        # Set halfmove_clock
-        halfmove_clock = int(halfmove_clock_fen)
-
-        # Set move_number
-        move_number = int(move_number_fen)
+    def set_position(
+        self,
+        board: list[piece.PieceSymbol],
+        turn: piece.Color,
+        castling_rights: list[str],
+        ep_square: Optional[square.Square],
+        halfmove_clock: int,
+        move_number: int,
+    ) -> None:
+        # Set keys, scores and piece squares in one pass over the board
+        zobrist_key = 0
+        piece_squares = [set() for _ in piece.COLORS]
+        king_squares = [None for _ in piece.COLORS]
+        middlegame_scores = evaluation.MIDDLEGAME_SCORES
+        endgame_scores = evaluation.ENDGAME_SCORES
+        middlegame_score = endgame_score = phase = 0
+
+        for square_i in square.SQUARES:
+            symbol = board[square_i]
+            if symbol == ".":
+                continue
+            color = FEN_SYMBOL_COLORS[symbol]
+            zobrist_key ^= ZOBRIST_PIECES[symbol][square_i]
+            piece_squares[color].add(square_i)
+            if symbol in "Kk":
+                king_squares[color] = square_i
+            middlegame_score += middlegame_scores[symbol][square_i]
+            endgame_score += endgame_scores[symbol][square_i]
+            phase += evaluation.PHASES[symbol]
 
         # Set values
         self.board = board
@@ -101,66 +265,216 @@ class Position:
         self.ep_square = ep_square
         self.halfmove_clock = halfmove_clock
         self.move_number = move_number
+        self.piece_squares = piece_squares
+        self.king_squares = king_squares
+        self.middlegame_score = middlegame_score
+        self.endgame_score = endgame_score
+        self.phase = phase
+
+        # Finish the key with the state fields
+        for right in castling_rights:
+            zobrist_key ^= ZOBRIST_CASTLING[right]
+        if turn == piece.BLACK:
+            zobrist_key ^= ZOBRIST_TURN
+        self.zobrist_key = zobrist_key ^ self.ep_key()
 
     def fen(self) -> str:
-        # Set board_fen
-        board_fen = ""
-        empty_squares = 0
-        for i, square_i in enumerate(square.SQUARES):
-            if self.board[square_i] == ".":
-                empty_squares += 1
-            elif self.board[square_i].lower() in piece.PIECE_SYMBOLS:
-                if empty_squares > 0:
-                    board_fen += str(empty_squares)
-                empty_squares = 0
-                board_fen += self.board[square_i]
-
-            if (i + 1) % 8 == 0:
-                if empty_squares > 0:
-                    board_fen += str(empty_squares)
-                empty_squares = 0
+        # Join the ranks, then replace runs of empty squares with their length
+        board = self.board
+        board_fen = "/".join(
+            "".join(board[rank_start : rank_start + 8]) for rank_start in RANK_STARTS
+        )
+        for empty_string, run in FEN_EMPTY_STRINGS:
+            board_fen = board_fen.replace(empty_string, run)
 
-            if (i + 1) % 8 == 0 and i < 63:
-                board_fen += "/"
+        return " ".join(
+            [
+                board_fen,
+                "w" if self.turn == piece.WHITE else "b",
+                "".join(self.castling_rights) or "-",
+                self.ep_square.name() if self.ep_square is not None else "-",
+                str(self.halfmove_clock),
+                str(self.move_number),
+            ]
+        )
 
-        # Set turn_fen
-        turn_fen = "w" if self.turn == piece.WHITE else "b"
+    @classmethod
+    def from_fen_many(cls, fens: Iterable[str]) -> Iterator[Position]:
+        # Skip __init__, which would parse the initial position first
+        for fen in fens:
+            my_position = cls.__new__(cls)
+            my_position.move_stack = []
+            my_position.position_stack = []
+            my_position.set_fen(fen)
+            yield my_position
+
+    @staticmethod
+    def fens_many(positions: Iterable[Position]) -> Iterator[str]:
+        for my_position in positions:
+            yield my_position.fen()
+
+    def to_bytes(self) -> bytes:
+        # Pack occupied squares from a1 to h8 and their piece codes
+        board = self.board
+        occupancy = 0
+        pieces = 0
+        shift = 0
+        for number, square_i in enumerate(square.SQUARE_INDEXES):
+            symbol = board[square_i]
+            if symbol != ".":
+                occupancy |= 1 << number
+                pieces |= PIECE_CODES[symbol] << shift
+                shift += 4
+        if shift > 128:
+            raise ValueError("can't encode more than 32 pieces")
+        if not 0 <= self.halfmove_clock <= 255:
+            raise ValueError(f"can't encode halfmove clock: {self.halfmove_clock}")
+        if not 0 <= self.move_number <= 0xFFFF:
+            raise ValueError(f"can't encode move number: {self.move_number}")
+
+        flags = self.turn == piece.BLACK
+        for k, right in enumerate(FEN_CASTLING_RIGHTS):
+            if right in self.castling_rights:
+                flags |= 2 << k
+        ep_file = 0
+        if self.ep_square is not None:
+            ep_file = "abcdefgh".index(self.ep_square.file()) + 1
+
+        return POSITION_STRUCT.pack(
+            occupancy,
+            pieces.to_bytes(16, "little"),
+            flags,
+            ep_file,
+            self.halfmove_clock,
+            self.move_number,
+        )
 
-        # Set castling_rights_fen
-        castling_rights_fen = "".join(self.castling_rights)
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Position:
+        occupancy, pieces, flags, ep_file, halfmove_clock, move_number = (
+            POSITION_STRUCT.unpack(data)
+        )
+        pieces = int.from_bytes(pieces, "little")
+        board = EMPTY_BOARD.copy()
+        while occupancy:
+            number = (occupancy & -occupancy).bit_length() - 1
+            symbol = CODE_SYMBOLS.get(pieces & 15)
+            if symbol is None:
+                raise ValueError(f"invalid piece code: {pieces & 15}")
+            board[square.SQUARE_INDEXES[number]] = symbol
+            pieces >>= 4
+            occupancy &= occupancy - 1
+
+        turn = piece.BLACK if flags & 1 else piece.WHITE
+        castling_rights = [
+            right for k, right in enumerate(FEN_CASTLING_RIGHTS) if flags & (2 << k)
+        ]
+        if ep_file > 8:
+            raise ValueError(f"invalid en passant file: {ep_file}")
+        ep_square = None
+        if ep_file:
+            ep_rank = "3" if turn == piece.BLACK else "6"
+            ep_square = square.Square.from_name("abcdefgh"[ep_file - 1] + ep_rank)
+
+        my_position = cls.__new__(cls)
+        my_position.move_stack = []
+        my_position.position_stack = []
+        my_position.set_position(
+            board, turn, castling_rights, ep_square, halfmove_clock, move_number
+        )
+        return my_position
+
+    def copy(self, stack: bool = False) -> Position:
+        # Copy the board state, and share the history copy-on-write with stack
+        my_position = self.__class__.__new__(self.__class__)
+        my_position.__dict__.update(self.__dict__)
+        my_position.board = self.board.copy()
+        my_position.piece_squares = [squares.copy() for squares in self.piece_squares]
+        my_position.king_squares = self.king_squares.copy()
+
+        if stack:
+            self.shared_stacks = my_position.shared_stacks = True
+        else:
+            my_position.move_stack = []
+            my_position.position_stack = []
+            my_position.shared_stacks = False
+        return my_position
 
-        # Set ep_square_fen
-        ep_square_fen = self.ep_square.name() if self.ep_square is not None else "-"
+    def unshare_stacks(self) -> None:
+        self.move_stack = self.move_stack.copy()
+        self.position_stack = self.position_stack.copy()
+        self.shared_stacks = False
 
-        # Set halfmove_clock_fen
-        halfmove_clock_fen = str(self.halfmove_clock)
+    def hash(self) -> ZobristKey:
+        return self.zobrist_key
 
-        # Set move_number_fen
-        move_number_fen = str(self.move_number)
+    def compute_hash(self) -> ZobristKey:
+        zobrist_key = 0
+        for square_i in square.SQUARES:
+            if self.board[square_i] != ".":
+                zobrist_key ^= ZOBRIST_PIECES[self.board[square_i]][square_i]
 
-        # Return fen
-        return " ".join(
-            [
-                board_fen,
-                turn_fen,
-                castling_rights_fen,
-                ep_square_fen,
-                halfmove_clock_fen,
-                move_number_fen,
-            ]
-        )
+        for right in self.castling_rights:
+            zobrist_key ^= ZOBRIST_CASTLING[right]
+
+        zobrist_key ^= self.ep_key()
+
+        if self.turn == piece.BLACK:
+            zobrist_key ^= ZOBRIST_TURN
+        return zobrist_key
+
+    def eval(self) -> evaluation.Score:
+        # Tapered score from the side to move's point of view
+        score = evaluation.taper(self.middlegame_score, self.endgame_score, self.phase)
+        return score if self.turn == piece.WHITE else -score
 
-    def position_state(self) -> PositionState:
-        return PositionState(self)
+    def ep_key(self) -> ZobristKey:
+        # Only hash the en passant square when a pawn can capture onto it
+        if self.ep_square is None:
+            return 0
+
+        if self.turn == piece.WHITE:
+            pawn, pushed_square = "P", self.ep_square.index + piece.S
+        else:
+            pawn, pushed_square = "p", self.ep_square.index + piece.N
+
+        if (
+            self.board[pushed_square + piece.E] != pawn
+            and self.board[pushed_square + piece.W] != pawn
+        ):
+            return 0
+        return ZOBRIST_EP_FILES[self.ep_square.file()]
 
     def get_piece(self, square: square.Square) -> piece.Piece:
         return piece.Piece.from_symbol(self.board[square.index])
 
     def set_piece(self, piece: piece.Piece, square: square.Square) -> None:
-        self.board[square.index] = piece.symbol()
+        self.remove_piece(square)
+        symbol = piece.symbol()
+        # A pawn beside the en passant square can change whether it's hashed
+        self.zobrist_key ^= self.ep_key()
+        self.board[square.index] = symbol
+        self.zobrist_key ^= ZOBRIST_PIECES[symbol][square.index] ^ self.ep_key()
+        self.middlegame_score += evaluation.MIDDLEGAME_SCORES[symbol][square.index]
+        self.endgame_score += evaluation.ENDGAME_SCORES[symbol][square.index]
+        self.phase += evaluation.PHASES[symbol]
+        self.piece_squares[piece.color].add(square.index)
+        if symbol in "Kk":
+            self.king_squares[piece.color] = square.index
 
     def remove_piece(self, square: square.Square) -> None:
-        self.board[square.index] = "."
+        symbol = self.board[square.index]
+        if symbol != ".":
+            color = piece.WHITE if symbol.isupper() else piece.BLACK
+            self.zobrist_key ^= ZOBRIST_PIECES[symbol][square.index] ^ self.ep_key()
+            self.middlegame_score -= evaluation.MIDDLEGAME_SCORES[symbol][square.index]
+            self.endgame_score -= evaluation.ENDGAME_SCORES[symbol][square.index]
+            self.phase -= evaluation.PHASES[symbol]
+            self.piece_squares[color].discard(square.index)
+            if self.king_squares[color] == square.index:
+                self.king_squares[color] = None
+            self.board[square.index] = "."
+            self.zobrist_key ^= self.ep_key()
 
     def opposing_color(self) -> piece.Color:
         if self.turn == piece.WHITE:
@@ -169,48 +483,295 @@ class Position:
             opposing_color = piece.WHITE
         return opposing_color
 
-    def generate_moves(self) -> list[move.Move]:
-        my_moves = []
+    def find_checks_and_pins(
+        self, color: piece.Color
+    ) -> tuple[list[square.SquareIndex], set[square.SquareIndex], dict[int, int]]:
+        board = self.board
+        king_i = self.find_king(color).index
+
+        friendly = str.isupper if color == piece.WHITE else str.islower
+        pawn, knight, bishop, rook, queen, _ = attacks.COLOR_SYMBOLS[3 - color]
+
+        checkers = []
+        check_squares = set()
+        pins = {}
+
+        # Look along each line from the king for checkers and pinned pieces
+        for direction, ray in attacks.RAYS[king_i]:
+            if direction in piece.PIECE_DIRECTIONS[piece.ROOK]:
+                sliders = (rook, queen)
+            else:
+                sliders = (bishop, queen)
+
+            pinned = None
+            path = []
+            for j in ray:
+                symbol_j = board[j]
+                if symbol_j == ".":
+                    path.append(j)
+                elif friendly(symbol_j):
+                    if pinned is not None:
+                        break
+                    pinned = j
+                else:
+                    if symbol_j in sliders:
+                        if pinned is None:
+                            checkers.append(j)
+                            check_squares.update(path)
+                            check_squares.add(j)
+                        else:
+                            pins[pinned] = direction
+                    break
+
+        # Look for leaper checkers
+        for leap_squares, symbol in (
+            (attacks.KNIGHT_SQUARES[king_i], knight),
+            (attacks.PAWN_ATTACKER_SQUARES[3 - color][king_i], pawn),
+        ):
+            for j in leap_squares:
+                if board[j] == symbol:
+                    checkers.append(j)
+                    check_squares.add(j)
 
-        for i in square.SQUARES:
-            square_i = square.Square(i)
-            piece_i = self.get_piece(square_i)
+        return checkers, check_squares, pins
 
-            # Skip empty squares
-            if piece_i.piece_type == piece.EMPTY_PIECE:
-                continue
+    def _checks_and_pins(self) -> tuple:
+        # What _generate_moves needs to know about checks and pins on the king
+        # of the side to move, so staged generation finds them only once
+        return self.find_checks_and_pins(self.turn)
+
+    def generate_moves(self) -> list[move.Move]:
+        return self._generate_moves()
+
+    def generate_captures(self) -> list[move.Move]:
+        return self._generate_moves(quiets=False)
+
+    def generate_quiets(self) -> list[move.Move]:
+        return self._generate_moves(captures=False)
+
+    def iter_moves(
+        self, stage: MoveStage = QUIET_STAGE, hash_move: Optional[move.Move] = None
+    ) -> Iterator[move.Move]:
+        # Yield the hash move first, if it is legal here
+        if hash_move is not None:
+            if self.is_legal(hash_move):
+                yield hash_move
+            else:
+                hash_move = None
+
+        if stage < CAPTURE_STAGE:
+            return
+
+        # Yield captures, most valuable victim then least valuable attacker
+        checks_and_pins = self._checks_and_pins()
+        captures = self._generate_moves(quiets=False, checks_and_pins=checks_and_pins)
+        for my_move in sorted(captures, key=self.mvv_lva, reverse=True):
+            if my_move != hash_move:
+                yield my_move
+
+        if stage < PROMOTION_STAGE:
+            return
+
+        # Yield promotions, then the remaining quiet moves
+        quiets = self._generate_moves(captures=False, checks_and_pins=checks_and_pins)
+        for my_move in quiets:
+            if my_move.promotion is not None and my_move != hash_move:
+                yield my_move
+
+        if stage < QUIET_STAGE:
+            return
+
+        for my_move in quiets:
+            if my_move.promotion is None and my_move != hash_move:
+                yield my_move
+
+    def mvv_lva(self, move: move.Move) -> int:
+        victim = self.board[move.to_square.index]
+        if victim == ".":
+            victim = "p"
+        attacker = self.board[move.from_square.index]
+        return (
+            piece.Piece.from_symbol(victim).piece_type * 8
+            - piece.Piece.from_symbol(attacker).piece_type
+        )
 
-            # Skip opponent pieces
-            if piece_i.color != self.turn:
+    def _is_generated(self, move: move.Move) -> bool:
+        # Generate only the moving piece's moves to check one move
+        if move.from_square.index not in self.piece_squares[self.turn]:
+            return False
+        return move in self._generate_moves(from_squares=[move.from_square.index])
+
+    def is_legal(self, move: move.Move) -> bool:
+        board = self.board
+        i = move.from_square.index
+        j = move.to_square.index
+        symbol = board[i]
+        target = board[j]
+        turn = self.turn
+
+        # Check the moving piece and target square
+        if symbol == "." or FEN_SYMBOL_COLORS[symbol] != turn:
+            return False
+        if target != "." and FEN_SYMBOL_COLORS[target] == turn:
+            return False
+
+        # Check the piece's geometry and path
+        piece_type = symbol.lower()
+        capture_square = j
+        if piece_type == "p":
+            forward = piece.N if turn == piece.WHITE else piece.S
+            if j == i + forward:
+                if target != ".":
+                    return False
+            elif j == i + 2 * forward:
+                start_rank = 2 if turn == piece.WHITE else 7
+                if move.from_square.rank() != start_rank:
+                    return False
+                if target != "." or board[i + forward] != ".":
+                    return False
+            elif j - i in (forward + piece.E, forward + piece.W):
+                if target == ".":
+                    if self.ep_square is None or j != self.ep_square.index:
+                        return False
+                    capture_square = j - forward
+            else:
+                return False
+
+            # Promote exactly on the last rank, to a piece of our own color
+            last_rank = 8 if turn == piece.WHITE else 1
+            if move.to_square.rank() == last_rank:
+                promotion = move.promotion
+                if promotion is None or promotion.color != turn:
+                    return False
+                if promotion.piece_type in (piece.PAWN, piece.KING):
+                    return False
+            elif move.promotion is not None:
+                return False
+        elif move.promotion is not None:
+            return False
+        elif piece_type == "n":
+            if j not in attacks.KNIGHT_SQUARES[i]:
+                return False
+        elif piece_type == "k":
+            if (i, j) in CASTLING_ROOK_MOVES:
+                return self._is_generated(move)
+            if j not in attacks.KING_SQUARES[i]:
+                return False
+        else:
+            direction = attacks.RAY_DIRECTIONS[i].get(j)
+            if direction is None:
+                return False
+            if piece_type != "q" and (
+                direction in piece.PIECE_DIRECTIONS[piece.ROOK]
+            ) != (piece_type == "r"):
+                return False
+            for k in range(i + direction, j, direction):
+                if board[k] != ".":
+                    return False
+
+        # Check the king is safe with the move made on the board alone
+        captured = board[capture_square]
+        board[capture_square] = "."
+        board[i] = "."
+        board[j] = symbol
+        king_i = j if piece_type == "k" else self.king_squares[turn]
+        # Only the mailbox board has the move, so use its attack test
+        is_legal = not Position.is_attacked(self, 3 - turn, square.Square(king_i))
+        board[j] = target
+        board[capture_square] = captured
+        board[i] = symbol
+        return is_legal
+
+    def push_uci(self, uci: str) -> move.Move:
+        if len(uci) not in (4, 5):
+            raise ValueError(f"invalid UCI move: {uci}")
+        my_move = move.Move.from_uci(uci)
+        if not self.is_legal(my_move):
+            raise ValueError(f"illegal move in {self.fen()}: {uci}")
+        self.make_move(my_move)
+        return my_move
+
+    def _generate_moves(
+        self,
+        captures: bool = True,
+        quiets: bool = True,
+        from_squares: Optional[list[square.SquareIndex]] = None,
+        checks_and_pins: Optional[tuple] = None,
+    ) -> list[move.Move]:
+        my_moves = []
+        board = self.board
+        friendly = str.isupper if self.turn == piece.WHITE else str.islower
+        ep_index = self.ep_square.index if self.ep_square is not None else None
+
+        # Find checks and pins once, so every move below is legal
+        king_square = self.find_king(self.turn)
+        if checks_and_pins is None:
+            checks_and_pins = self._checks_and_pins()
+        checkers, check_squares, pins = checks_and_pins
+
+        if from_squares is None:
+            from_squares = sorted(self.piece_squares[self.turn])
+
+        # Add king moves, with the king lifted off the board
+        if king_square.index in from_squares:
+            board[king_square.index] = "."
+            for j in attacks.KING_SQUARES[king_square.index]:
+                if friendly(board[j]) or not (captures if board[j] != "." else quiets):
+                    continue
+
+                square_j = square.Square(j)
+                if not self.is_attacked(self.opposing_color(), square_j):
+                    my_moves.append(move.Move(king_square, square_j))
+            board[king_square.index] = piece.Piece(self.turn, piece.KING).symbol()
+
+        # Only the king can answer a double check
+        if len(checkers) > 1:
+            return my_moves
+
+        # Sort the piece squares, so move order doesn't depend on history
+        for i in from_squares:
+            symbol_i = board[i]
+
+            # Skip the king
+            if i == king_square.index:
                 continue
 
+            square_i = square.Square(i)
+            piece_i = piece.Piece.from_symbol(symbol_i)
+            pin = pins.get(i)
+
             # Loop over directions
             for direction in piece_i.directions():
+                # Keep pinned pieces on the pin line
+                if pin is not None:
+                    line = direction
+                    if direction in (piece.N + piece.N, piece.S + piece.S):
+                        line = direction // 2
+                    if line != pin and line != -pin:
+                        continue
+
                 step = direction
 
                 # Use a loop for sliding pieces
                 while True:
                     j = i + step
+                    symbol_j = board[j]
 
-                    # Stay on board
-                    if j not in square.SQUARES:
-                        break
-
-                    square_j = square.Square(j)
-                    piece_j = self.get_piece(square_j)
-
-                    # Stay off friendly pieces
-                    if piece_i.color == piece_j.color:
+                    # Stay on board and off friendly pieces
+                    if symbol_j == " " or friendly(symbol_j):
                         break
 
                     # Determine pawn moves
                     if piece_i.piece_type == piece.PAWN:
-                        if (
-                            direction in (piece.N, piece.S)
-                            and piece_j.piece_type != piece.EMPTY_PIECE
-                        ):
+                        if direction in (piece.N, piece.S) and symbol_j != ".":
                             break
 
+                        if direction in (piece.N + piece.N, piece.S + piece.S):
+                            if square_i.rank() not in (2, 7):
+                                break
+                            if board[i + direction // 2] != "." or symbol_j != ".":
+                                break
+
                         if (
                             direction
                             in (
@@ -219,45 +780,32 @@ class Position:
                                 piece.S + piece.E,
                                 piece.S + piece.W,
                             )
-                            and piece_j.color != self.opposing_color()
-                            and square_j != self.ep_square
+                            and symbol_j == "."
                         ):
+                            # En passant is the only move tried on the board
+                            ep_move = move.Move(square_i, square.Square(j))
+                            if (
+                                j == ep_index
+                                and captures
+                                and not self.is_into_check(ep_move)
+                            ):
+                                my_moves.append(ep_move)
                             break
 
-                        if direction == piece.N + piece.N:
-                            piece_int = self.get_piece(square.Square(i + piece.N))
-
-                            if square_i.rank() != 2:
-                                break
-                            if piece_int.piece_type != piece.EMPTY_PIECE:
-                                break
-                            if piece_j.piece_type != piece.EMPTY_PIECE:
-                                break
+                    # Skip moves that leave the king in check or aren't requested
+                    if (checkers and j not in check_squares) or not (
+                        captures if symbol_j != "." else quiets
+                    ):
+                        if symbol_j != "." or not piece_i.is_sliding():
+                            break
 
-                        if direction == piece.S + piece.S:
-                            piece_int = self.get_piece(square.Square(i + piece.S))
+                        step += direction
+                        continue
 
-                            if square_i.rank() != 7:
-                                break
-                            if piece_int.piece_type != piece.EMPTY_PIECE:
-                                break
-                            if piece_j.piece_type != piece.EMPTY_PIECE:
-                                break
-
-                    # Break if moving into check
-                    if self.is_into_check(move.Move(square_i, square_j)):
-                        break
+                    square_j = square.Square(j)
 
                     # Determine promotion moves
-                    if (
-                        piece_i.piece_type == piece.PAWN
-                        and piece_i.color == piece.WHITE
-                        and square_j.rank() == 8
-                    ) or (
-                        piece_i.piece_type == piece.PAWN
-                        and piece_i.color == piece.BLACK
-                        and square_j.rank() == 1
-                    ):
+                    if piece_i.piece_type == piece.PAWN and square_j.rank() in (1, 8):
                         # Loop over promotion options
                         for promotion_symbol in ["q", "r", "b", "n"]:
                             if piece_i.color == piece.WHITE:
@@ -275,7 +823,7 @@ class Position:
                     my_moves.append(my_move)
 
                     # Break for captures
-                    if piece_j.color == self.opposing_color():
+                    if symbol_j != ".":
                         break
 
                     # Break for non-sliding pieces
@@ -285,11 +833,14 @@ class Position:
                     # Iterate step for sliding pieces
                     step += direction
 
-        # Add castling moves
+        # Add castling moves, which are quiet king moves
+        if not quiets or king_square.index not in from_squares:
+            return my_moves
+
         if (
             self.turn == piece.WHITE
             and "K" in self.castling_rights
-            and not self.is_check()
+            and not checkers
             and self.get_piece(square.Square.from_name("f1")).piece_type
             == piece.EMPTY_PIECE
             and self.get_piece(square.Square.from_name("g1")).piece_type
@@ -306,7 +857,9 @@ class Position:
         if (
             self.turn == piece.WHITE
             and "Q" in self.castling_rights
-            and not self.is_check()
+            and not checkers
+            and self.get_piece(square.Square.from_name("b1")).piece_type
+            == piece.EMPTY_PIECE
             and self.get_piece(square.Square.from_name("c1")).piece_type
             == piece.EMPTY_PIECE
             and self.get_piece(square.Square.from_name("d1")).piece_type
@@ -323,7 +876,7 @@ class Position:
         if (
             self.turn == piece.BLACK
             and "k" in self.castling_rights
-            and not self.is_check()
+            and not checkers
             and self.get_piece(square.Square.from_name("f8")).piece_type
             == piece.EMPTY_PIECE
             and self.get_piece(square.Square.from_name("g8")).piece_type
@@ -340,7 +893,9 @@ class Position:
         if (
             self.turn == piece.BLACK
             and "q" in self.castling_rights
-            and not self.is_check()
+            and not checkers
+            and self.get_piece(square.Square.from_name("b8")).piece_type
+            == piece.EMPTY_PIECE
             and self.get_piece(square.Square.from_name("c8")).piece_type
             == piece.EMPTY_PIECE
             and self.get_piece(square.Square.from_name("d8")).piece_type
@@ -357,155 +912,131 @@ class Position:
         return my_moves
 
     def make_move(self, move: move.Move) -> None:
-        # Update move stack
+        board = self.board
+        square_i = move.from_square.index
+        square_j = move.to_square.index
+        piece_i = piece.Piece.from_symbol(board[square_i])
+
+        # Find captured piece
+        capture_square = square_j
+        if piece_i.piece_type == piece.PAWN and move.to_square == self.ep_square:
+            if piece_i.color == piece.WHITE:
+                capture_square = square_j + piece.S
+            else:
+                capture_square = square_j + piece.N
+
+        # Find castling rook move
+        rook_move = None
+        if piece_i.piece_type == piece.KING:
+            rook_move = CASTLING_ROOK_MOVES.get((square_i, square_j))
+
+        # Update stacks
+        if self.shared_stacks:
+            self.unshare_stacks()
         self.move_stack.append(move)
+        self.position_stack.append(
+            PositionState(
+                board[square_i],
+                board[capture_square],
+                capture_square,
+                self.castling_rights,
+                self.ep_square,
+                self.halfmove_clock,
+                rook_move,
+                self.zobrist_key,
+                self.middlegame_score,
+                self.endgame_score,
+                self.phase,
+            )
+        )
 
-        # Update position stack
-        self.position_stack.append(self.position_state())
+        # Update halfmove clock
+        if piece_i.piece_type == piece.PAWN or board[capture_square] != ".":
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
 
         # Update board
-        square_i = move.from_square
-        square_j = move.to_square
-        piece_i = self.get_piece(move.from_square)
-        piece_j = self.get_piece(move.to_square)
-
-        self.remove_piece(move.from_square)
-        self.set_piece(piece_i, move.to_square)
-
-        # Make en passant capture
-        if (
-            piece_i.piece_type == piece.PAWN
-            and piece_i.color == piece.WHITE
-            and square_j == self.ep_square
-        ):
-            square_ep_capture = square.Square(square_j.index + piece.S)
-            self.remove_piece(square_ep_capture)
-
-        if (
-            piece_i.piece_type == piece.PAWN
-            and piece_i.color == piece.BLACK
-            and square_j == self.ep_square
-        ):
-            square_ep_capture = square.Square(square_j.index + piece.N)
-            self.remove_piece(square_ep_capture)
-
-        # Make castle move
-        if (
-            piece_i.piece_type == piece.KING
-            and square_i == square.Square(square.E1)
-            and square_j == square.Square(square.G1)
-        ):
-            rook_square_i = square.Square.from_name("h1")
-            rook_square_j = square.Square.from_name("f1")
-            rook_piece_i = self.get_piece(rook_square_i)
-            self.remove_piece(rook_square_i)
-            self.set_piece(rook_piece_i, rook_square_j)
-
-        if (
-            piece_i.piece_type == piece.KING
-            and square_i == square.Square(square.E1)
-            and square_j == square.Square(square.C1)
-        ):
-            rook_square_i = square.Square.from_name("a1")
-            rook_square_j = square.Square.from_name("d1")
-            rook_piece_i = self.get_piece(rook_square_i)
-            self.remove_piece(rook_square_i)
-            self.set_piece(rook_piece_i, rook_square_j)
+        zobrist_key = self.zobrist_key ^ self.ep_key() ^ ZOBRIST_TURN
+        moved_piece = board[square_i]
+        captured_piece = board[capture_square]
+        zobrist_key ^= ZOBRIST_PIECES[moved_piece][square_i]
+        if captured_piece != ".":
+            zobrist_key ^= ZOBRIST_PIECES[captured_piece][capture_square]
+
+        board[capture_square] = "."
+        board[square_i] = "."
+        if move.promotion is not None:
+            board[square_j] = move.promotion.symbol()
+        else:
+            board[square_j] = moved_piece
+        zobrist_key ^= ZOBRIST_PIECES[board[square_j]][square_j]
+
+        # Update evaluation by the moved and captured pieces
+        middlegame_scores = evaluation.MIDDLEGAME_SCORES
+        endgame_scores = evaluation.ENDGAME_SCORES
+        placed_piece = board[square_j]
+        self.middlegame_score += (
+            middlegame_scores[placed_piece][square_j]
+            - middlegame_scores[moved_piece][square_i]
+            - middlegame_scores[captured_piece][capture_square]
+        )
+        self.endgame_score += (
+            endgame_scores[placed_piece][square_j]
+            - endgame_scores[moved_piece][square_i]
+            - endgame_scores[captured_piece][capture_square]
+        )
+        if captured_piece != "." or placed_piece != moved_piece:
+            self.phase += (
+                evaluation.PHASES[placed_piece]
+                - evaluation.PHASES[moved_piece]
+                - evaluation.PHASES[captured_piece]
+            )
 
-        if (
-            piece_i.piece_type == piece.KING
-            and square_i == square.Square(square.E8)
-            and square_j == square.Square(square.G8)
-        ):
-            rook_square_i = square.Square.from_name("h8")
-            rook_square_j = square.Square.from_name("f8")
-            rook_piece_i = self.get_piece(rook_square_i)
-            self.remove_piece(rook_square_i)
-            self.set_piece(rook_piece_i, rook_square_j)
+        if rook_move is not None:
+            rook_square_i, rook_square_j = rook_move
+            rook_piece = board[rook_square_i]
+            board[rook_square_j] = rook_piece
+            board[rook_square_i] = "."
+            zobrist_key ^= ZOBRIST_PIECES[rook_piece][rook_square_i]
+            zobrist_key ^= ZOBRIST_PIECES[rook_piece][rook_square_j]
+            self.middlegame_score += (
+                middlegame_scores[rook_piece][rook_square_j]
+                - middlegame_scores[rook_piece][rook_square_i]
+            )
+            self.endgame_score += (
+                endgame_scores[rook_piece][rook_square_j]
+                - endgame_scores[rook_piece][rook_square_i]
+            )
 
-        if (
-            piece_i.piece_type == piece.KING
-            and square_i == square.Square(square.E8)
-            and square_j == square.Square(square.C8)
-        ):
-            rook_square_i = square.Square.from_name("a8")
-            rook_square_j = square.Square.from_name("d8")
-            rook_piece_i = self.get_piece(rook_square_i)
-            self.remove_piece(rook_square_i)
-            self.set_piece(rook_piece_i, rook_square_j)
+        # Update piece squares
+        my_squares = self.piece_squares[self.turn]
+        my_squares.remove(square_i)
+        my_squares.add(square_j)
+        if captured_piece != ".":
+            self.piece_squares[self.opposing_color()].remove(capture_square)
+        if piece_i.piece_type == piece.KING:
+            self.king_squares[self.turn] = square_j
+            if rook_move is not None:
+                my_squares.remove(rook_square_i)
+                my_squares.add(rook_square_j)
 
         # Update castling rights
-        if piece_i.color == piece.WHITE:
-            if piece_i.piece_type == piece.KING:
-                self.castling_rights = [
-                    x for x in self.castling_rights if x not in ("K", "Q")
-                ]
-
-            if piece_i.piece_type == piece.ROOK and square_i == square.Square(
-                square.A1
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "Q"]
-
-            if piece_i.piece_type == piece.ROOK and square_i == square.Square(
-                square.H1
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "K"]
-
-            if piece_j.piece_type == piece.ROOK and square_j == square.Square(
-                square.A1
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "Q"]
-
-            if piece_j.piece_type == piece.ROOK and square_j == square.Square(
-                square.H1
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "K"]
-
-        if piece_i.color == piece.BLACK:
-            if piece_i.piece_type == piece.KING:
-                self.castling_rights = [
-                    x for x in self.castling_rights if x not in ("k", "q")
-                ]
-
-            if piece_i.piece_type == piece.ROOK and square_i == square.Square(
-                square.A8
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "q"]
-
-            if piece_i.piece_type == piece.ROOK and square_i == square.Square(
-                square.H8
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "k"]
-
-            if piece_j.piece_type == piece.ROOK and square_j == square.Square(
-                square.A8
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "q"]
-
-            if piece_j.piece_type == piece.ROOK and square_j == square.Square(
-                square.H8
-            ):
-                self.castling_rights = [x for x in self.castling_rights if x != "k"]
+        lost_rights = CASTLING_RIGHTS_SQUARES.get(square_i, "")
+        lost_rights += CASTLING_RIGHTS_SQUARES.get(square_j, "")
+        if lost_rights:
+            castling_rights = []
+            for x in self.castling_rights:
+                if x in lost_rights:
+                    zobrist_key ^= ZOBRIST_CASTLING[x]
+                else:
+                    castling_rights.append(x)
+            self.castling_rights = castling_rights
 
         # Update en passant square
         self.ep_square = None
-        if (
-            piece_i.piece_type == piece.PAWN
-            and square_j.index - square_i.index == piece.N + piece.N
-        ):
-            self.ep_square = square.Square(square_i.index + piece.N)
-
-        if (
-            piece_i.piece_type == piece.PAWN
-            and square_j.index - square_i.index == piece.S + piece.S
-        ):
-            self.ep_square = square.Square(square_i.index + piece.S)
-
-        # Update halfmove clock
-        if piece_i.piece_type == piece.PAWN or piece_j.color == self.opposing_color():
-            self.halfmove_clock = 0
-        else:
-            self.halfmove_clock += 1
+        if piece_i.piece_type == piece.PAWN and abs(square_j - square_i) == 20:
+            self.ep_square = square.Square((square_i + square_j) // 2)
 
         # Update move number
         if self.turn == piece.BLACK:
@@ -514,92 +1045,121 @@ class Position:
         # Update turn
         self.turn = self.opposing_color()
 
-    def unmake_move(self) -> None:
-        self.move_stack.pop()
-        last_position = self.position_stack.pop()
+        # Update zobrist key
+        self.zobrist_key = zobrist_key ^ self.ep_key()
 
-        self.board = last_position.board.copy()
-        self.turn = last_position.turn
-        self.castling_rights = last_position.castling_rights.copy()
-        self.ep_square = last_position.ep_square
-        self.halfmove_clock = last_position.halfmove_clock
-        self.move_number = last_position.move_number
+    def unmake_move(self) -> None:
+        if self.shared_stacks:
+            self.unshare_stacks()
+        move = self.move_stack.pop()
+        last_state = self.position_stack.pop()
+
+        # Restore board
+        board = self.board
+        board[move.to_square.index] = "."
+        board[last_state.capture_square] = last_state.captured_piece
+        board[move.from_square.index] = last_state.moved_piece
+
+        if last_state.rook_move is not None:
+            rook_square_i, rook_square_j = last_state.rook_move
+            board[rook_square_i] = board[rook_square_j]
+            board[rook_square_j] = "."
+
+        # Restore piece squares
+        my_squares = self.piece_squares[self.opposing_color()]
+        my_squares.remove(move.to_square.index)
+        my_squares.add(move.from_square.index)
+        if last_state.captured_piece != ".":
+            self.piece_squares[self.turn].add(last_state.capture_square)
+        if last_state.moved_piece in "Kk":
+            self.king_squares[self.opposing_color()] = move.from_square.index
+            if last_state.rook_move is not None:
+                my_squares.remove(rook_square_j)
+                my_squares.add(rook_square_i)
+
+        # Restore state
+        self.turn = self.opposing_color()
+        self.castling_rights = last_state.castling_rights
+        self.ep_square = last_state.ep_square
+        self.halfmove_clock = last_state.halfmove_clock
+        self.zobrist_key = last_state.zobrist_key
+        self.middlegame_score = last_state.middlegame_score
+        self.endgame_score = last_state.endgame_score
+        self.phase = last_state.phase
+        if self.turn == piece.BLACK:
+            self.move_number -= 1
 
     def find_king(self, color: piece.Color) -> square.Square:
-        king = piece.Piece(color, piece.KING)
-        return square.Square(self.board.index(king.symbol()))
+        return square.Square(self.king_squares[color])
 
     def find_attackers(
         self, attacking_color: piece.Color, target_square: square.Square
     ) -> list[square.Square]:
+        board = self.board
+        i = target_square.index
+        pawn, knight, bishop, rook, queen, king = attacks.COLOR_SYMBOLS[attacking_color]
         attackers = []
 
-        pieces = [
-            piece.Piece(attacking_color, piece.PAWN),
-            piece.Piece(attacking_color, piece.KNIGHT),
-            piece.Piece(attacking_color, piece.BISHOP),
-            piece.Piece(attacking_color, piece.ROOK),
-            piece.Piece(attacking_color, piece.QUEEN),
-            piece.Piece(attacking_color, piece.KING),
-        ]
+        # Look for leapers
+        for j in attacks.PAWN_ATTACKER_SQUARES[attacking_color][i]:
+            if board[j] == pawn:
+                attackers.append(j)
 
-        for piece_i in pieces:
-            directions = piece_i.directions()
-
-            if piece_i.piece_type == piece.PAWN:
-                # Filter for attacking moves
-                directions = filter(
-                    lambda x: x
-                    in [
-                        piece.N + piece.E,
-                        piece.N + piece.W,
-                        piece.S + piece.E,
-                        piece.S + piece.W,
-                    ],
-                    directions,
-                )
-
-                # Look in the reverse direction of attack
-                directions = [-d for d in directions]
-
-            # Loop over directions
-            for direction in directions:
-                step = direction
-
-                # Use a loop for sliding pieces
-                while True:
-                    j = target_square.index + step
+        for j in attacks.KNIGHT_SQUARES[i]:
+            if board[j] == knight:
+                attackers.append(j)
 
-                    # Break if off board
-                    if j not in square.SQUARES:
-                        break
-
-                    square_j = square.Square(j)
-                    piece_j = self.get_piece(square_j)
-
-                    # Check for attacker
-                    if piece_i == piece_j:
-                        attackers.append(square_j)
-                        break
-
-                    # Break if not empty
-                    if piece_j.piece_type != piece.EMPTY_PIECE:
-                        break
-
-                    # Break for non-sliding pieces
-                    if not piece_i.is_sliding():
+        # Look along rays for the first piece
+        for symbol, rays in (
+            (bishop, attacks.DIAGONAL_RAYS[i]),
+            (rook, attacks.ORTHOGONAL_RAYS[i]),
+            (queen, attacks.ORTHOGONAL_RAYS[i] + attacks.DIAGONAL_RAYS[i]),
+        ):
+            for ray in rays:
+                for j in ray:
+                    if board[j] != ".":
+                        if board[j] == symbol:
+                            attackers.append(j)
                         break
 
-                    # Iterate step for sliding pieces
-                    step += direction
+        for j in attacks.KING_SQUARES[i]:
+            if board[j] == king:
+                attackers.append(j)
 
-        return attackers
+        return [square.Square(j) for j in attackers]
 
     def is_attacked(
         self, attacking_color: piece.Color, target_square: square.Square
     ) -> bool:
-        attackers = self.find_attackers(attacking_color, target_square)
-        return len(attackers) > 0
+        board = self.board
+        i = target_square.index
+        pawn, knight, bishop, rook, queen, king = attacks.COLOR_SYMBOLS[attacking_color]
+
+        # Return on the first attacker found, searching out from the target
+        for j in attacks.KNIGHT_SQUARES[i]:
+            if board[j] == knight:
+                return True
+
+        for j in attacks.PAWN_ATTACKER_SQUARES[attacking_color][i]:
+            if board[j] == pawn:
+                return True
+
+        for j in attacks.KING_SQUARES[i]:
+            if board[j] == king:
+                return True
+
+        for sliders, rays in (
+            ((rook, queen), attacks.ORTHOGONAL_RAYS[i]),
+            ((bishop, queen), attacks.DIAGONAL_RAYS[i]),
+        ):
+            for ray in rays:
+                for j in ray:
+                    if board[j] != ".":
+                        if board[j] in sliders:
+                            return True
+                        break
+
+        return False
 
     def is_into_check(self, move) -> bool:
         self.make_move(move)
@@ -611,3 +1171,45 @@ class Position:
 
     def is_check(self) -> bool:
         return self.is_attacked(self.opposing_color(), self.find_king(self.turn))
+
+    def is_repetition(self, count: int = 3) -> bool:
+        # Compare keys of earlier positions with the same side to move, back to
+        # the last capture or pawn move, since nothing before it can repeat
+        zobrist_key = self.zobrist_key
+        stack = self.position_stack
+        stop = max(len(stack) - self.halfmove_clock, 0)
+        seen = 1
+        for k in range(len(stack) - 2, stop - 1, -2):
+            if stack[k].zobrist_key == zobrist_key:
+                seen += 1
+                if seen >= count:
+                    return True
+        return False
+
+    def is_fifty_moves(self) -> bool:
+        return self.halfmove_clock >= 100
+
+    def is_insufficient_material(self) -> bool:
+        # Bare kings, a single minor piece, or only bishops on one square color
+        minor_squares = []
+        for color in [piece.WHITE, piece.BLACK]:
+            for square_i in self.piece_squares[color]:
+                symbol = self.board[square_i]
+                if symbol in "PpRrQq":
+                    return False
+                if symbol not in "Kk":
+                    minor_squares.append(square_i)
+
+        if len(minor_squares) <= 1:
+            return True
+        if any(self.board[square_i] in "Nn" for square_i in minor_squares):
+            return False
+        return len({(i // 10 + i % 10) % 2 for i in minor_squares}) == 1
+
+    def is_game_over(self) -> bool:
+        return (
+            self.is_fifty_moves()
+            or self.is_insufficient_material()
+            or self.is_repetition()
+            or not self.generate_moves()
+        )
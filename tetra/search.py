@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from typing import Callable, Optional
+
+from tetra import bitbase, cache, evaluation, move, position, square
+
+# Create search constants
+Score = evaluation.Score
+
+INFINITE_SCORE = 1_000_000
+MATE_SCORE = 100_000
+MAX_PLY = 128
+
+# Mate scores count plies from the root, so anything this close is a mate
+MATE_THRESHOLD = MATE_SCORE - MAX_PLY
+
+# Score of a position the bitbases say is won, below any mate
+KNOWN_WIN_SCORE = 20_000
+
+# Bound flags of transposition table entries
+BOUNDS = [EMPTY_BOUND, EXACT_BOUND, LOWER_BOUND, UPPER_BOUND] = range(4)
+
+# Bytes per table entry: key, move, score, depth, bound and generation
+TT_ENTRY_SIZE = 8 + 2 + 4 + 1 + 1 + 1
+
+# Nodes between checks of the clock
+CHECK_INTERVAL = 1024
+
+
+# Create search limits class
+class SearchLimits:
+    """Limits on the depth, nodes and time of a search"""
+
+    def __init__(
+        self,
+        depth: Optional[int] = None,
+        nodes: Optional[int] = None,
+        movetime: Optional[int] = None,
+    ) -> None:
+        self.depth = depth
+        self.nodes = nodes
+        self.movetime = movetime
+
+    def __repr__(self) -> str:
+        return (
+            f"SearchLimits(depth={self.depth}, nodes={self.nodes}, "
+            f"movetime={self.movetime})"
+        )
+
+
+# Create search result class
+class SearchResult:
+    """The best move, score and principal variation of a search"""
+
+    def __init__(
+        self,
+        best_move: Optional[move.Move],
+        score: Score,
+        pv: list[move.Move],
+        depth: int,
+        nodes: int,
+        seconds: float,
+    ) -> None:
+        self.best_move = best_move
+        self.score = score
+        self.pv = pv
+        self.depth = depth
+        self.nodes = nodes
+        self.seconds = seconds
+
+    def __repr__(self) -> str:
+        best_move = self.best_move.uci() if self.best_move is not None else None
+        return (
+            f"SearchResult(best_move='{best_move}', score={self.score}, "
+            f"depth={self.depth}, nodes={self.nodes})"
+        )
+
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def is_mate(self) -> bool:
+        return abs(self.score) >= MATE_THRESHOLD
+
+    def mate_in(self) -> Optional[int]:
+        # Moves to mate, negative when the side to move is getting mated
+        if not self.is_mate():
+            return None
+        plies = MATE_SCORE - abs(self.score)
+        moves = (plies + 1) // 2
+        return moves if self.score > 0 else -moves
+
+
+# Create transposition table class
+class TranspositionTable:
+    """A fixed-size hash table of search scores, bounds and best moves"""
+
+    def __init__(self, size_mb: float = 16) -> None:
+        # Round the entry count down to a power of two, so keys index by mask
+        entries = max(1, int(size_mb * 2**20) // TT_ENTRY_SIZE)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+
+        self.keys = array("Q", bytes(8 * self.size))
+        self.moves = array("H", bytes(2 * self.size))
+        self.scores = array("i", bytes(4 * self.size))
+        self.depths = array("B", bytes(self.size))
+        self.bounds = array("B", bytes(self.size))
+        self.generations = array("B", bytes(self.size))
+        self.generation = 0
+        self.stats = cache.CacheStats()
+
+    def new_search(self) -> None:
+        # Entries from older searches can be replaced whatever their depth
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(
+        self, key: position.ZobristKey
+    ) -> Optional[tuple[Optional[move.Move], Score, int, int]]:
+        i = key & self.mask
+        if self.bounds[i] == EMPTY_BOUND or self.keys[i] != key:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        move_int = self.moves[i]
+        best_move = move.Move.from_int(move_int) if move_int else None
+        return best_move, self.scores[i], self.depths[i], self.bounds[i]
+
+    def store(
+        self,
+        key: position.ZobristKey,
+        best_move: Optional[move.Move],
+        score: Score,
+        depth: int,
+        bound: int,
+    ) -> None:
+        # Prefer deeper entries, unless they are stale or for the same position
+        i = key & self.mask
+        if self.bounds[i] != EMPTY_BOUND:
+            if (
+                self.keys[i] != key
+                and self.generations[i] == self.generation
+                and depth < self.depths[i]
+            ):
+                return
+            if self.keys[i] != key:
+                self.stats.evictions += 1
+
+        self.keys[i] = key
+        self.moves[i] = best_move.to_int() if best_move is not None else 0
+        self.scores[i] = score
+        self.depths[i] = depth
+        self.bounds[i] = bound
+        self.generations[i] = self.generation
+        self.stats.stores += 1
+
+    def clear(self) -> None:
+        self.bounds = array("B", bytes(self.size))
+        self.generation = 0
+        self.stats = cache.CacheStats()
+
+    def hashfull(self) -> int:
+        # Permille of entries used by the current search, sampled
+        sample = min(1000, self.size)
+        used = sum(
+            1
+            for i in range(sample)
+            if self.bounds[i] != EMPTY_BOUND and self.generations[i] == self.generation
+        )
+        return 1000 * used // sample
+
+
+class SearchStopped(Exception):
+    """Raised inside a search to unwind it when a limit is reached"""
+
+
+# Create searcher class
+class Searcher:
+    """An iterative deepening principal variation alpha-beta search"""
+
+    def __init__(
+        self,
+        table: Optional[TranspositionTable] = None,
+        bitbases: Optional[bitbase.Bitbases] = None,
+    ) -> None:
+        self.table = table if table is not None else TranspositionTable()
+        self.bitbases = bitbases
+        self.stopped = False
+        self.nodes = 0
+
+        # Time budget, which another thread can restart during a search
+        self.clock_lock = threading.Lock()
+        self.clock: Optional[tuple[float, float]] = None
+        self.deadline: Optional[float] = None
+
+    def stop(self) -> None:
+        self.stopped = True
+
+    def start_clock(self, movetime: int) -> None:
+        # Give the search movetime milliseconds from now, even if it is only
+        # about to start, as when a ponder search's move is played
+        with self.clock_lock:
+            start = time.perf_counter()
+            self.clock = (start, start + movetime / 1000)
+            self.deadline = self.clock[1]
+
+    def search(
+        self,
+        my_position: position.Position,
+        limits: Optional[SearchLimits] = None,
+        callback: Optional[Callable[[SearchResult], None]] = None,
+    ) -> SearchResult:
+        # A stop or clock requested just before the search starts still counts
+        try:
+            return self._iterate(my_position, limits, callback)
+        finally:
+            self.stopped = False
+            with self.clock_lock:
+                self.clock = None
+                self.deadline = None
+
+    def _iterate(
+        self,
+        my_position: position.Position,
+        limits: Optional[SearchLimits],
+        callback: Optional[Callable[[SearchResult], None]],
+    ) -> SearchResult:
+        limits = limits if limits is not None else SearchLimits(depth=4)
+        max_depth = limits.depth if limits.depth is not None else MAX_PLY - 1
+
+        self.position = my_position
+        self.limits = limits
+        self.nodes = 0
+        self.next_check = CHECK_INTERVAL
+        if limits.nodes is not None:
+            self.next_check = min(limits.nodes, CHECK_INTERVAL)
+        self.start = time.perf_counter()
+        with self.clock_lock:
+            if self.clock is None and limits.movetime is not None:
+                self.clock = (self.start, self.start + limits.movetime / 1000)
+            self.deadline = self.clock[1] if self.clock is not None else None
+        self.pv = [[] for _ in range(MAX_PLY + 1)]
+        self.table.new_search()
+
+        # Fall back on the first legal move if no iteration completes
+        my_moves = my_position.generate_moves()
+        result = SearchResult(
+            my_moves[0] if my_moves else None,
+            0,
+            my_moves[:1],
+            0,
+            0,
+            0.0,
+        )
+        if not my_moves:
+            result.score = -MATE_SCORE if my_position.is_check() else 0
+            return result
+
+        stack_size = len(my_position.move_stack)
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._negamax(depth, -INFINITE_SCORE, INFINITE_SCORE, 0)
+            except SearchStopped:
+                # Unwind the moves made inside the interrupted iteration
+                while len(my_position.move_stack) > stack_size:
+                    my_position.unmake_move()
+                break
+
+            seconds = time.perf_counter() - self.start
+            pv = list(self.pv[0])
+            result = SearchResult(pv[0], score, pv, depth, self.nodes, seconds)
+            if callback is not None:
+                callback(result)
+
+            # Stop once a mate is found or another iteration wouldn't finish
+            if result.is_mate() and MATE_SCORE - abs(score) <= depth:
+                break
+            with self.clock_lock:
+                clock = self.clock
+            if clock is not None:
+                clock_start, deadline = clock
+                if time.perf_counter() - clock_start > (deadline - clock_start) / 2:
+                    break
+
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - self.start
+        return result
+
+    def _check_limits(self) -> None:
+        # Check the clock every few nodes, but stop exactly on node limits
+        self.next_check = self.nodes + CHECK_INTERVAL
+        if self.limits.nodes is not None:
+            self.next_check = min(self.next_check, self.limits.nodes)
+        if self.stopped:
+            raise SearchStopped
+        if self.limits.nodes is not None and self.nodes >= self.limits.nodes:
+            raise SearchStopped
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchStopped
+
+    def _negamax(self, depth: int, alpha: Score, beta: Score, ply: int) -> Score:
+        my_position = self.position
+        self.pv[ply] = []
+
+        # Draw by the fifty move rule, or by repeating any earlier position
+        if ply > 0 and (my_position.is_fifty_moves() or my_position.is_repetition(2)):
+            return 0
+
+        # Bitbase draws end the search. Wins and losses are still searched, so
+        # mates are found, and only scored from the bitbase at the leaves.
+        known_result = None
+        if ply > 0 and self.bitbases is not None:
+            known_result = self.bitbases.probe(my_position)
+            if known_result == bitbase.DRAW:
+                return 0
+
+        in_check = my_position.is_check()
+        if in_check:
+            depth += 1
+
+        if depth <= 0 or ply >= MAX_PLY:
+            # Leaves aren't in check, so a known result here isn't a mate, and
+            # the evaluation keeps the winning side making progress
+            if known_result is not None:
+                return self._known_score(known_result)
+            return self._quiesce(alpha, beta, ply)
+
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self._check_limits()
+
+        # Probe the transposition table
+        key = my_position.hash()
+        hash_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            hash_move, tt_score, tt_depth, tt_bound = entry
+            tt_score = self._score_from_table(tt_score, ply)
+            if ply > 0 and beta - alpha == 1 and tt_depth >= depth:
+                if (
+                    tt_bound == EXACT_BOUND
+                    or (tt_bound == LOWER_BOUND and tt_score >= beta)
+                    or (tt_bound == UPPER_BOUND and tt_score <= alpha)
+                ):
+                    return tt_score
+
+        original_alpha = alpha
+        best_score = -INFINITE_SCORE
+        best_move = None
+        moves_searched = 0
+
+        for my_move in my_position.iter_moves(hash_move=hash_move):
+            my_position.make_move(my_move)
+
+            # Search the first move with a full window, the rest with a null one
+            if moves_searched == 0:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self._negamax(depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+
+            my_position.unmake_move()
+            moves_searched += 1
+
+            if score > best_score:
+                best_score = score
+                best_move = my_move
+                if score > alpha:
+                    alpha = score
+                    self.pv[ply] = [my_move] + self.pv[ply + 1]
+                    if alpha >= beta:
+                        break
+
+        # Checkmate or stalemate
+        if moves_searched == 0:
+            return -MATE_SCORE + ply if in_check else 0
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT_BOUND
+        self.table.store(
+            key, best_move, self._score_to_table(best_score, ply), depth, bound
+        )
+        return best_score
+
+    def _quiesce(self, alpha: Score, beta: Score, ply: int) -> Score:
+        my_position = self.position
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self._check_limits()
+
+        # Stand pat on the static evaluation
+        score = my_position.eval()
+        if score >= beta or ply >= MAX_PLY:
+            return score
+        alpha = max(alpha, score)
+
+        for my_move in my_position.iter_moves(position.CAPTURE_STAGE):
+            my_position.make_move(my_move)
+            score = -self._quiesce(-beta, -alpha, ply + 1)
+            my_position.unmake_move()
+
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+
+        return alpha
+
+    def _known_score(self, result: bitbase.WDL) -> Score:
+        # Reward the winning side for driving the bare king to the edge and
+        # closing in with its own king, which the evaluation doesn't
+        my_position = self.position
+        turn = my_position.turn
+        losing = turn if result == bitbase.LOSS else 3 - turn
+        losing_king = square.SQUARE_NUMBERS[my_position.king_squares[losing]]
+        winning_king = square.SQUARE_NUMBERS[my_position.king_squares[3 - losing]]
+        rank, file = losing_king >> 3, losing_king & 7
+        edge = max(3 - rank, rank - 4) + max(3 - file, file - 4)
+        distance = max(abs(rank - (winning_king >> 3)), abs(file - (winning_king & 7)))
+        mop_up = KNOWN_WIN_SCORE + 10 * edge + 4 * (7 - distance)
+        return result * mop_up + my_position.eval()
+
+    @staticmethod
+    def _score_to_table(score: Score, ply: int) -> Score:
+        # Store mate scores relative to the node rather than the root
+        if score >= MATE_THRESHOLD:
+            return score + ply
+        if score <= -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_table(score: Score, ply: int) -> Score:
+        if score >= MATE_THRESHOLD:
+            return score - ply
+        if score <= -MATE_THRESHOLD:
+            return score + ply
+        return score
+
+
+def search(
+    my_position: position.Position,
+    limits: Optional[SearchLimits] = None,
+    table: Optional[TranspositionTable] = None,
+) -> SearchResult:
+    return Searcher(table).search(my_position, limits)
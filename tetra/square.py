@@ -41,13 +41,33 @@ SQUARES = [
 ]
 # fmt: on
 
+# Square numbers run from a1 = 0 to h8 = 63
+SquareNumber = int
+SQUARE_INDEXES = [91 - 10 * (i >> 3) + (i & 7) for i in range(64)]
+SQUARE_NUMBERS = [-1 for _ in range(120)]
+for i, square_i in enumerate(SQUARE_INDEXES):
+    SQUARE_NUMBERS[square_i] = i
+
+_square_cache = {}
+
 
 # Create square class
 class Square:
     """A square on a chess board"""
 
-    def __init__(self, index: SquareIndex) -> None:
-        self.index = index
+    __slots__ = ("index",)
+
+    def __new__(cls, index: SquareIndex) -> Square:
+        # Intern squares, so each index has a single instance
+        self = _square_cache.get(index)
+        if self is None:
+            self = super().__new__(cls)
+            self.index = index
+            _square_cache[index] = self
+        return self
+
+    def __reduce__(self) -> tuple:
+        return (Square, (self.index,))
 
     def __repr__(self) -> str:
         return f"Square.from_name('{self.name()}')"
@@ -61,6 +81,12 @@ class Square:
         else:
             return NotImplemented
 
+    def __hash__(self) -> int:
+        return self.index
+
+    def number(self) -> SquareNumber:
+        return SQUARE_NUMBERS[self.index]
+
     def name(self) -> str:
         return SQUARE_NAMES[self.index]
 
@@ -74,3 +100,7 @@ class Square:
     def from_name(cls, name: SquareName) -> Square:
         index = SQUARE_NAMES.index(name)
         return cls(index)
+
+    @classmethod
+    def from_number(cls, number: SquareNumber) -> Square:
+        return cls(SQUARE_INDEXES[number])
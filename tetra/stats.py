@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from tetra import bitboard, position
+
+# Create instrumentation constants
+# Search generates captures and quiets by stage, so move generation is also
+# counted at _generate_moves, where every kind of generation ends up
+INSTRUMENTED_METHODS = [
+    "generate_moves",
+    "_generate_moves",
+    "make_move",
+    "unmake_move",
+    "is_into_check",
+    "is_legal",
+    "find_attackers",
+    "is_attacked",
+    "set_fen",
+    "fen",
+]
+
+# Nodes are counted as moves made, except those made to test legality
+NODE_METHOD = "make_move"
+LEGALITY_METHODS = ["is_into_check", "is_legal"]
+
+BACKENDS = [position.Position, bitboard.BitboardPosition]
+
+
+# Create call stats class
+class CallStats:
+    """Call count and cumulative time of one instrumented method"""
+
+    __slots__ = ["calls", "seconds", "active"]
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.active = False
+
+    def __repr__(self) -> str:
+        return f"CallStats(calls={self.calls}, seconds={self.seconds:.6f})"
+
+
+# Create profile class
+class Profile:
+    """Call counts and times of the instrumented position methods"""
+
+    def __init__(self) -> None:
+        self.methods = {name: CallStats() for name in INSTRUMENTED_METHODS}
+        self.node_count = 0
+
+    def __getitem__(self, name: str) -> CallStats:
+        return self.methods[name]
+
+    def reset(self) -> None:
+        for stats in self.methods.values():
+            stats.calls = 0
+            stats.seconds = 0.0
+        self.node_count = 0
+
+    def nodes(self) -> int:
+        return self.node_count
+
+    def as_dict(self) -> dict[str, object]:
+        nodes = self.nodes()
+        methods = {}
+        for name, stats in self.methods.items():
+            methods[name] = {
+                "calls": stats.calls,
+                "seconds": stats.seconds,
+                "us_per_call": (
+                    stats.seconds / stats.calls * 1e6 if stats.calls else 0.0
+                ),
+                "calls_per_node": stats.calls / nodes if nodes else 0.0,
+                "us_per_node": stats.seconds / nodes * 1e6 if nodes else 0.0,
+            }
+        return {"nodes": nodes, "methods": methods}
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def report(self) -> str:
+        lines = [
+            f"{'method':<16}{'calls':>12}{'seconds':>10}{'us/call':>9}{'/node':>8}"
+        ]
+        for name, row in self.as_dict()["methods"].items():
+            lines.append(
+                f"{name:<16}{row['calls']:>12}{row['seconds']:>10.3f}"
+                f"{row['us_per_call']:>9.2f}{row['calls_per_node']:>8.2f}"
+            )
+        return "\n".join(lines)
+
+
+PROFILE = Profile()
+
+# Original methods by class and name, while instrumentation is enabled
+_originals: dict[tuple[type, str], Callable] = {}
+
+
+def _instrument(
+    function: Callable, stats: CallStats, counts_nodes: bool = False
+) -> Callable:
+    perf_counter = time.perf_counter
+    guards = [PROFILE[name] for name in LEGALITY_METHODS]
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # Overrides calling their base method are timed once, at the outer call
+        if stats.active:
+            return function(*args, **kwargs)
+        stats.active = True
+        if counts_nodes and not any(guard.active for guard in guards):
+            PROFILE.node_count += 1
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.seconds += perf_counter() - start
+            stats.calls += 1
+            stats.active = False
+
+    return wrapper
+
+
+def enable(backends: Iterable[type[position.Position]] = BACKENDS) -> Profile:
+    # Wrap each method where the class defines it, so overrides are covered
+    for backend in backends:
+        for name in INSTRUMENTED_METHODS:
+            if name in vars(backend) and (backend, name) not in _originals:
+                function = vars(backend)[name]
+                _originals[backend, name] = function
+                setattr(
+                    backend,
+                    name,
+                    _instrument(function, PROFILE[name], name == NODE_METHOD),
+                )
+    return PROFILE
+
+
+def disable() -> None:
+    # Put the original methods back, so disabled instrumentation costs nothing
+    for (backend, name), function in _originals.items():
+        setattr(backend, name, function)
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+@contextlib.contextmanager
+def profile(
+    backends: Iterable[type[position.Position]] = BACKENDS,
+) -> Iterator[Profile]:
+    PROFILE.reset()
+    enable(backends)
+    try:
+        yield PROFILE
+    finally:
+        disable()
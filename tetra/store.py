@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import mmap
+import os
+from typing import Iterable, Iterator, Optional, Union
+
+from tetra import position
+
+# Create store constants
+RECORD_SIZE = position.POSITION_SIZE
+
+
+# Create position store class
+class PositionStore:
+    """An append-only file of encoded positions, read through mmap"""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        backend: type[position.Position] = position.Position,
+    ) -> None:
+        self.path = path
+        self.backend = backend
+        self.file = open(path, "a+b")
+        self.view = memoryview(b"")
+
+        size = os.fstat(self.file.fileno()).st_size
+        if size % RECORD_SIZE:
+            self.file.close()
+            raise ValueError(f"{path} is not a position store")
+
+    def __enter__(self) -> PositionStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._map()) // RECORD_SIZE
+
+    def __getitem__(self, index: int) -> position.Position:
+        return self.backend.from_bytes(self.get_bytes(index))
+
+    def __iter__(self) -> Iterator[position.Position]:
+        view = self._map()
+        for offset in range(0, len(view), RECORD_SIZE):
+            yield self.backend.from_bytes(view[offset : offset + RECORD_SIZE])
+
+    def get_bytes(self, index: int) -> memoryview:
+        # A view into the mapped file, without copying the record
+        view = self._map()
+        count = len(view) // RECORD_SIZE
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("position store index out of range")
+        return view[index * RECORD_SIZE : (index + 1) * RECORD_SIZE]
+
+    def get_bytes_range(self, start: int = 0, stop: Optional[int] = None) -> memoryview:
+        # Consecutive records as one view, for bulk readers
+        view = self._map()
+        start, stop, _ = slice(start, stop).indices(len(view) // RECORD_SIZE)
+        return view[start * RECORD_SIZE : max(start, stop) * RECORD_SIZE]
+
+    def append(self, my_position: position.Position) -> int:
+        # Return the index of the appended position
+        self.file.write(my_position.to_bytes())
+        return self.file.tell() // RECORD_SIZE - 1
+
+    def extend(self, positions: Iterable[position.Position]) -> int:
+        count = 0
+        for my_position in positions:
+            self.file.write(my_position.to_bytes())
+            count += 1
+        return count
+
+    def close(self) -> None:
+        # Views handed out keep their map alive until they're released
+        self.view = memoryview(b"")
+        self.file.close()
+
+    def _map(self) -> memoryview:
+        # Remap after appends, so reads see every record written so far
+        self.file.flush()
+        size = os.fstat(self.file.fileno()).st_size
+        if size != len(self.view):
+            mapped = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+            self.view = memoryview(mapped)
+        return self.view
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional, TextIO
+
+from tetra import bitbase, perft, piece, polyglot, position, search
+
+# Create UCI constants
+ENGINE_NAME = "tetra"
+ENGINE_AUTHOR = "Joe Vanderlans"
+
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 4096
+
+# Milliseconds kept back per move for communication lag
+MOVE_OVERHEAD = 30
+
+# Moves to plan for when the time control doesn't say
+DEFAULT_MOVES_TO_GO = 30
+
+
+def allocate_time(
+    time_left: int, increment: int = 0, moves_to_go: Optional[int] = None
+) -> int:
+    # Spread the remaining time over the moves to go, plus most of the increment
+    time_left = max(time_left - MOVE_OVERHEAD, 0)
+    budget = time_left // (moves_to_go or DEFAULT_MOVES_TO_GO) + increment * 3 // 4
+    return max(min(budget, time_left // 2), 1)
+
+
+def parse_go(tokens: list[str], turn: piece.Color) -> tuple[search.SearchLimits, bool]:
+    # Return the search limits and whether to search until told to stop
+    values = {}
+    flags = set()
+    k = 0
+    while k < len(tokens):
+        token = tokens[k]
+        if token in ("infinite", "ponder"):
+            flags.add(token)
+        elif k + 1 < len(tokens) and tokens[k + 1].lstrip("-").isdigit():
+            values[token] = int(tokens[k + 1])
+            k += 1
+        k += 1
+
+    movetime = values.get("movetime")
+    time_left = values.get("wtime" if turn == piece.WHITE else "btime")
+    if movetime is None and time_left is not None and not flags:
+        increment = values.get("winc" if turn == piece.WHITE else "binc", 0)
+        movetime = allocate_time(time_left, increment, values.get("movestogo"))
+
+    limits = search.SearchLimits(values.get("depth"), values.get("nodes"), movetime)
+    return limits, bool(flags)
+
+
+def format_info(result: search.SearchResult, hashfull: int) -> str:
+    if result.is_mate():
+        score = f"mate {result.mate_in()}"
+    else:
+        score = f"cp {result.score}"
+    pv = " ".join(my_move.uci() for my_move in result.pv)
+    return (
+        f"info depth {result.depth} score {score} nodes {result.nodes} "
+        f"nps {result.nps():.0f} hashfull {hashfull} "
+        f"time {result.seconds * 1000:.0f} pv {pv}"
+    )
+
+
+async def read_lines(stream: TextIO) -> AsyncIterator[str]:
+    # Read blocking input in a thread, so the event loop stays responsive
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, stream.readline)
+        if not line:
+            return
+        yield line
+
+
+# Create UCI engine class
+class UciEngine:
+    """A UCI protocol front-end that searches in a worker thread"""
+
+    def __init__(
+        self,
+        output: TextIO = sys.stdout,
+        backend: type[position.Position] = position.Position,
+        hash_mb: float = DEFAULT_HASH_MB,
+        book: Optional[polyglot.Book] = None,
+        bitbases: Optional[bitbase.Bitbases] = None,
+    ) -> None:
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.backend = backend
+        self.searcher = search.Searcher(search.TranspositionTable(hash_mb), bitbases)
+        self.book = book
+
+        self.position = backend()
+        self.base_fen = position.INITIAL_FEN
+        self.moves = []
+
+        self.executor = ThreadPoolExecutor(1)
+        self.search_future: Optional[asyncio.Future] = None
+        self.ponder_limits: Optional[search.SearchLimits] = None
+        self.release = threading.Event()
+
+    def send(self, line: str) -> None:
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    async def run(self, lines: AsyncIterator[str]) -> None:
+        async for line in lines:
+            if not await self.handle(line):
+                break
+        await self.stop()
+        self.executor.shutdown()
+
+    async def handle(self, line: str) -> bool:
+        # Return False once the GUI asks to quit
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(
+                f"option name Hash type spin default {DEFAULT_HASH_MB} "
+                f"min 1 max {MAX_HASH_MB}"
+            )
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            await self.stop()
+            self.set_option(arguments)
+        elif command == "ucinewgame":
+            await self.stop()
+            self.searcher.table.clear()
+        elif command == "position":
+            await self.stop()
+            self.set_position(arguments)
+        elif command == "go":
+            await self.stop()
+            self.go(arguments)
+        elif command == "ponderhit":
+            self.ponderhit()
+        elif command == "stop":
+            await self.stop()
+        elif command == "quit":
+            return False
+        return True
+
+    def set_option(self, arguments: list[str]) -> None:
+        # setoption name <name> value <value>
+        if "value" not in arguments:
+            return
+        k = arguments.index("value")
+        name = " ".join(arguments[1:k]).lower()
+        value = " ".join(arguments[k + 1 :])
+        if name == "hash" and value.isdigit():
+            hash_mb = min(max(int(value), 1), MAX_HASH_MB)
+            self.searcher.table = search.TranspositionTable(hash_mb)
+
+    def set_position(self, arguments: list[str]) -> None:
+        # position [startpos | fen <fen>] [moves <move> ...]
+        if "moves" in arguments:
+            k = arguments.index("moves")
+            arguments, moves = arguments[:k], arguments[k + 1 :]
+        else:
+            moves = []
+        if arguments[:1] == ["fen"]:
+            fen = " ".join(arguments[1:])
+        else:
+            fen = position.INITIAL_FEN
+
+        # Apply only the new moves when the game continues from the last command
+        if fen != self.base_fen or moves[: len(self.moves)] != self.moves:
+            self.position = self.backend(fen)
+            self.base_fen = fen
+            self.moves = []
+        for uci in moves[len(self.moves) :]:
+            try:
+                self.position.push_uci(uci)
+            except ValueError:
+                self.send(f"info string illegal move {uci}")
+                break
+            self.moves.append(uci)
+
+    def go(self, arguments: list[str]) -> None:
+        limits, wait = parse_go(arguments, self.position.turn)
+
+        # Play a book move straight away, unless told to search until stopped
+        if self.book is not None and not wait:
+            book_move = self.book.choose(self.position)
+            if book_move is not None:
+                self.send(f"bestmove {book_move.uci()}")
+                return
+        if "ponder" in arguments:
+            # Keep the clock limits for when the ponder move is played
+            self.ponder_limits, _ = parse_go(
+                [token for token in arguments if token != "ponder"],
+                self.position.turn,
+            )
+
+        self.release.clear()
+        self.searcher.stopped = False
+        self.searcher.clock = None
+        loop = asyncio.get_running_loop()
+        self.search_future = loop.run_in_executor(
+            self.executor,
+            self._search,
+            self.position.copy(stack=True),
+            limits,
+            wait,
+        )
+
+    def ponderhit(self) -> None:
+        # Start the clock of a ponder search from now
+        limits = self.ponder_limits
+        self.ponder_limits = None
+        if limits is not None and limits.movetime is not None:
+            self.searcher.start_clock(limits.movetime)
+        self.release.set()
+
+    async def stop(self) -> None:
+        if self.search_future is None:
+            return
+        self.searcher.stop()
+        self.release.set()
+        await self.search_future
+        self.search_future = None
+
+    def _search(
+        self, my_position: position.Position, limits: search.SearchLimits, wait: bool
+    ) -> None:
+        result = self.searcher.search(my_position, limits, self._send_info)
+
+        # Infinite and ponder searches report only once released
+        if wait:
+            self.release.wait()
+
+        if result.best_move is None:
+            self.send("bestmove 0000")
+        elif len(result.pv) > 1:
+            self.send(f"bestmove {result.best_move.uci()} ponder {result.pv[1].uci()}")
+        else:
+            self.send(f"bestmove {result.best_move.uci()}")
+
+    def _send_info(self, result: search.SearchResult) -> None:
+        self.send(format_info(result, self.searcher.table.hashfull()))
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="tetra uci", description="Speak the UCI protocol over stdin and stdout"
+    )
+    parser.add_argument(
+        "-b", "--backend", choices=list(perft.BACKENDS), default="bitboard"
+    )
+    parser.add_argument("--hash", type=int, default=DEFAULT_HASH_MB, metavar="MB")
+    parser.add_argument("--book", help="play moves from this polyglot book first")
+    parser.add_argument(
+        "--bitbases", metavar="DIR", help="probe endgame bitbases from this directory"
+    )
+    args = parser.parse_args(argv)
+
+    book = polyglot.Book(args.book) if args.book is not None else None
+    bitbases = bitbase.Bitbases(args.bitbases) if args.bitbases is not None else None
+    engine = UciEngine(
+        sys.stdout, perft.BACKENDS[args.backend], args.hash, book, bitbases
+    )
+    try:
+        asyncio.run(engine.run(read_lines(sys.stdin)))
+    finally:
+        if book is not None:
+            book.close()
+        if bitbases is not None:
+            bitbases.close()
+    return 0